@@ -0,0 +1,164 @@
+"""Generators of synthetic maps used by benchmarks.
+
+Every generator returns a valid map as a string.
+Size parameters control how long the path is, roughly linearly.
+"""
+
+RIGHT = (0, 1)
+DOWN = (1, 0)
+LEFT = (0, -1)
+UP = (-1, 0)
+
+
+def _draw(segments: list[tuple[tuple[int, int], int]]) -> str:
+    """Draw a path made of straight segments, starting with `@` and ending with `x`.
+
+    Each segment is a direction and a length. Segments are joined with turns `+`.
+    If a segment crosses an already drawn cell, the cell is kept as it is,
+    so the path goes through a tunnel there.
+    """
+    cells = {(0, 0): "@"}
+    row_idx, col_idx = 0, 0
+    for (d_row, d_col), length in segments:
+        for _ in range(length):
+            row_idx += d_row
+            col_idx += d_col
+            cells.setdefault((row_idx, col_idx), "-" if d_row == 0 else "|")
+        cells[row_idx, col_idx] = "+"
+    cells[row_idx, col_idx] = "x"
+
+    min_row = min(row for row, _ in cells)
+    min_col = min(col for _, col in cells)
+    canvas = [[] for _ in range(max(row for row, _ in cells) - min_row + 1)]
+    for (row, col), char in sorted(cells.items()):
+        line = canvas[row - min_row]
+        line.extend(" " * (col - min_col - len(line)))
+        line.append(char)
+    return "\n".join("".join(line) for line in canvas)
+
+
+def spiral(size: int) -> str:
+    """Square spiral going inwards, with an empty line between its rings."""
+    segments = [(RIGHT, size)]
+    length = size
+    directions = (DOWN, LEFT, UP, RIGHT)
+    turn = 0
+    while length > 2:
+        segments.append((directions[turn % 4], length))
+        turn += 1
+        if turn % 2 == 0:
+            length -= 2
+    return _draw(segments)
+
+
+def _serpentine_segments(width: int, rows: int) -> list[tuple[tuple[int, int], int]]:
+    segments = []
+    for row in range(rows):
+        if row:
+            segments.append((DOWN, 2))
+        segments.append((RIGHT if row % 2 == 0 else LEFT, width))
+    return segments
+
+
+def serpentine(width: int, rows: int) -> str:
+    """Long horizontal lines connected at alternating ends."""
+    return _draw(_serpentine_segments(width, rows))
+
+
+def letters(width: int, rows: int) -> str:
+    """Serpentine where most of the path are letters."""
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    chars = list(serpentine(width, rows))
+    for idx, char in enumerate(chars):
+        if char == "-" and idx % 3:
+            chars[idx] = alphabet[idx % len(alphabet)]
+    return "".join(chars)
+
+
+def lattice(width: int, rows: int) -> str:
+    """Serpentine which goes straight through a dense lattice of junctions.
+
+    Every other cell of a horizontal line is a junction,
+    with short vertical lines above and below it which are never followed.
+    """
+    lines = serpentine(width, rows).split("\n")
+    canvas = [list(line.ljust(width + 1)) for line in lines]
+    for line_idx in range(0, len(canvas), 2):
+        for col_idx in range(2, width - 1, 2):
+            canvas[line_idx][col_idx] = "+"
+            if line_idx + 1 < len(canvas):
+                canvas[line_idx + 1][col_idx] = "|"
+    return "\n".join("".join(line).rstrip() for line in canvas)
+
+
+def tunnels(width: int, rows: int) -> str:
+    """Horizontal serpentine crossed by a vertical serpentine many times.
+
+    Every crossing is a tunnel.
+    """
+    segments = _serpentine_segments(width, rows)
+    # go below the serpentine and follow a vertical serpentine back through it
+    going_left = rows % 2 == 1
+    segments.append((DOWN, 2))
+    segments.append((LEFT if going_left else RIGHT, 1))
+    height = 2 * rows + 2
+    for column in range(width // 2):
+        if column:
+            segments.append((LEFT if going_left else RIGHT, 2))
+        segments.append((UP if column % 2 == 0 else DOWN, height))
+    segments.append((LEFT if going_left else RIGHT, 2))
+    return _draw(segments)
+
+
+def jagged(size: int) -> str:
+    """Staircase, each row is longer than the previous one."""
+    segments = [(DOWN, 2)]
+    for _ in range(size):
+        segments.append((RIGHT, 1))
+        segments.append((DOWN, 1))
+    return _draw(segments)
+
+
+def blocked_tunnels(count: int) -> str:
+    """Row of turns between crossed vertical lines.
+
+    Every turn first tries a tunnel back along the already visited row,
+    which is blocked at its start, and then a tunnel forward to the next turn.
+    """
+    lines = 2 * count + 1
+    segments = []
+    for line in range(lines):
+        if line:
+            segments.append((RIGHT, 2))
+        segments.append((DOWN if line % 2 == 0 else UP, 4))
+    # the last line goes on below the others, back under them and up to the row
+    segments[-1] = (DOWN, 6)
+    segments += [(LEFT, 2 * lines - 1), (UP, 4)]
+    canvas = [list(line.ljust(2 * lines + 1)) for line in _draw(segments).split("\n")]
+    for col_idx in range(2, 2 * lines, 2):
+        # a stub which doesn't lead down, so the turn is not just a crossing
+        canvas[2][col_idx] = "+"
+        canvas[3][col_idx] = "-"
+    canvas[2][0] = "+"
+    canvas[2][2 * lines] = "x"
+    return "\n".join("".join(line).rstrip() for line in canvas)
+
+
+def canvas(size: int, path_width: int = 100) -> str:
+    """Small serpentine in a corner of a huge, mostly empty canvas."""
+    rows = serpentine(path_width, path_width // 4).split("\n")
+    rows = [row.ljust(size) for row in rows]
+    rows.extend(" " * size for _ in range(size - len(rows)))
+    return "\n".join(rows)
+
+
+GENERATORS = {
+    "spiral": lambda scale: spiral(200 * scale),
+    "serpentine": lambda scale: serpentine(400 * scale, 100 * scale),
+    "lattice": lambda scale: lattice(400 * scale, 100 * scale),
+    "tunnels": lambda scale: tunnels(100 * scale, 50 * scale),
+    "letters": lambda scale: letters(400 * scale, 100 * scale),
+    "jagged": lambda scale: jagged(1000 * scale),
+    "blocked_tunnels": lambda scale: blocked_tunnels(500 * scale),
+    "canvas": lambda scale: canvas(2000 * scale),
+}
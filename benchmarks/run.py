@@ -0,0 +1,136 @@
+"""Run benchmarks on synthetic maps and store results as JSON.
+
+Preprocessing, `RoadMap` construction and following the path are measured separately.
+Use `--baseline` to compare results with a previous run, exit code is 1
+if anything got slower by more than `--max-slowdown`.
+
+For example:
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --baseline baseline.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os.path
+import platform
+import sys
+import time
+import tracemalloc
+
+if importlib.util.find_spec("saona") is None:
+    sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+from saona.path_finder import PathFinder
+from saona.preprocessor import process
+from saona.road_map import RoadMap
+
+from benchmarks.generators import GENERATORS
+
+PHASES = ("process_s", "build_s", "walk_s")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all by default")
+    parser.add_argument("--scale", type=int, default=1, help="size of generated maps")
+    parser.add_argument("--repeat", type=int, default=3, help="best of how many runs")
+    parser.add_argument("--backend", default="flat", help="backend of `process`")
+    parser.add_argument(
+        "--validate", default="strict", help="validation of `process`, strict or lazy"
+    )
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results in this JSON file")
+    parser.add_argument("--max-slowdown", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    names = args.names or list(GENERATORS)
+    results = {
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "backend": args.backend,
+        "validate": args.validate,
+        "benchmarks": {},
+    }
+    for name in names:
+        grid_str = GENERATORS[name](args.scale)
+        result = run_benchmark(grid_str, args.repeat, args.backend, args.validate)
+        results["benchmarks"][name] = result
+        print(
+            f"{name:<12} {result['cells']:>10} cells {result['steps']:>9} steps"
+            f" | process {result['cells_per_s']:>12.0f} cells/s"
+            f" | build {result['build_s'] * 1000:>8.2f} ms"
+            f" | walk {result['steps_per_s']:>10.0f} steps/s"
+            f" | peak {result['peak_bytes'] / 2**20:>7.1f} MiB"
+        )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        return compare(results, baseline, args.max_slowdown)
+    return 0
+
+
+def run_benchmark(
+    grid_str: str, repeat: int, backend: str, validate: str = "strict"
+) -> dict:
+    """Measure all phases of a traversal of one map, best of `repeat` runs."""
+    timings = {phase: float("inf") for phase in PHASES}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        grid, initial_position = process(grid_str, backend=backend, validate=validate)
+        processed = time.perf_counter()
+        road_map = RoadMap(grid, initial_position)
+        built = time.perf_counter()
+        _, path = PathFinder().follow_path(road_map)
+        walked = time.perf_counter()
+        for phase, duration in zip(
+            PHASES, (processed - started, built - processed, walked - built)
+        ):
+            timings[phase] = min(timings[phase], duration)
+
+    tracemalloc.start()
+    grid, initial_position = process(grid_str, backend=backend, validate=validate)
+    PathFinder().follow_path(RoadMap(grid, initial_position))
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    cells = len(grid_str)
+    return {
+        **timings,
+        "cells": cells,
+        "steps": len(path),
+        "cells_per_s": cells / timings["process_s"],
+        "steps_per_s": len(path) / timings["walk_s"],
+        "peak_bytes": peak_bytes,
+    }
+
+
+def compare(results: dict, baseline: dict, max_slowdown: float) -> int:
+    """Print how results differ from the baseline, 1 if something is too slow."""
+    if (results["scale"], results["backend"], results["validate"]) != (
+        baseline["scale"],
+        baseline["backend"],
+        baseline.get("validate", "strict"),
+    ):
+        print("Baseline was measured with a different scale, backend or validation")
+        return 1
+    exit_code = 0
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        ratios = []
+        for phase in PHASES:
+            ratio = result[phase] / baseline["benchmarks"][name][phase]
+            ratios.append(f"{phase[:-2]} x{ratio:.2f}")
+            if ratio > max_slowdown:
+                exit_code = 1
+                ratios[-1] += " (SLOWER)"
+        print(f"{name:<12} " + ", ".join(ratios))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
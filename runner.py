@@ -1,4 +1,9 @@
+import argparse
+import collections
+import json
 import sys
+import time
+from typing import Callable, Iterable, Iterator, TextIO
 
 try:
     import saona
@@ -7,16 +12,44 @@ except ImportError:
 
     # Project is using uv, so simply using `uv run runner.py` will auto prepare env.
     # But if user wants to use `python runner.py` we should support it too.
-    proj_root = os.path.dirname(__name__)
+    proj_root = os.path.dirname(os.path.abspath(__file__))
     sys.path.append(os.path.join(proj_root, "src"))
     import saona
 import saona.util
 
 
-def main():
-    if len(sys.argv) < 2:
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Follow paths in maps. Pass a map as an argument, "
+        "or use one of the options to traverse many maps and get JSONL results."
+    )
+    parser.add_argument("grid", nargs="?", help="map to traverse")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--file", nargs="+", help="files with one map each")
+    source.add_argument("--stdin", action="store_true", help="read one map from stdin")
+    source.add_argument(
+        "--jsonl", help='file with {"id", "grid"} records per line, "-" for stdin'
+    )
+    parser.add_argument("--output", help="file for JSONL results, stdout by default")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="traverse maps in parallel processes"
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=16, help="maps sent to a worker at once"
+    )
+    args = parser.parse_args(argv)
+
+    if args.file or args.stdin or args.jsonl:
+        if args.grid is not None:
+            parser.error("map argument can't be combined with other inputs")
+        run_batch(args)
+    elif args.grid is not None:
+        run_single(args.grid)
+    else:
         print("Pass grid as an string argument")
-    grid = sys.argv[1]
+
+
+def run_single(grid: str):
     print(grid)
     try:
         letters, path = saona.traverse(grid)
@@ -27,5 +60,118 @@ def main():
         print(f"Path followed: {path}")
 
 
+def run_batch(args: argparse.Namespace):
+    """Traverse maps from the selected input and write a JSONL result for each."""
+    if args.file:
+        records = _read_files(args.file)
+    elif args.stdin:
+        records = iter([("stdin", sys.stdin.read())])
+    elif args.jsonl == "-":
+        records = _read_jsonl(sys.stdin)
+    else:
+        records = _read_jsonl(open(args.jsonl, encoding="utf-8"))
+
+    if args.output is None:
+        output = sys.stdout
+    else:
+        output = open(args.output, "w", encoding="utf-8")
+
+    def write(result: dict):
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    try:
+        _traverse_records(records, args.workers, args.chunksize, write)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def _read_files(paths: list[str]) -> Iterator[tuple[str, str | Exception]]:
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as file:
+                yield path, file.read()
+        except (OSError, UnicodeDecodeError) as e:
+            yield path, ValueError(f"Invalid file {path}: {e}")
+
+
+def _read_jsonl(lines: TextIO) -> Iterator[tuple[object, str | Exception]]:
+    # Invalid records are passed on as errors, so they get a result too.
+    with lines:
+        for line_idx, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise TypeError("record has to be an object")
+                record_id = record.get("id", line_idx)
+                grid = record["grid"]
+                if not isinstance(grid, str):
+                    raise TypeError(f'"grid" is {type(grid).__name__}, not a string')
+            except (ValueError, TypeError, KeyError) as e:
+                yield line_idx, ValueError(f"Invalid record on line {line_idx}: {e!r}")
+            else:
+                yield record_id, grid
+
+
+def _traverse_records(
+    records: Iterable[tuple[object, str | Exception]],
+    workers: int,
+    chunksize: int,
+    write: Callable[[dict], None],
+):
+    if workers <= 1:
+        for record_id, grid in records:
+            if isinstance(grid, Exception):
+                write(_result(record_id, grid, 0.0))
+                continue
+            started = time.perf_counter()
+            try:
+                outcome = saona.traverse(grid)
+            except saona.util.PathError as e:
+                outcome = e
+            write(_result(record_id, outcome, time.perf_counter() - started))
+        return
+
+    # Results come in the same order as maps, so records have to wait only
+    # for maps before them which are still being traversed. Pending records
+    # always start with such a map, invalid records behind it are written
+    # as soon as its result is.
+    pending = collections.deque()
+
+    def iter_grids():
+        for record_id, grid in records:
+            if isinstance(grid, Exception):
+                if pending:
+                    pending.append((record_id, grid))
+                else:
+                    write(_result(record_id, grid, 0.0))
+                continue
+            pending.append((record_id, None))
+            yield grid
+
+    results = saona.iter_traverse_many(iter_grids(), workers, chunksize, timed=True)
+    for outcome, seconds in results:
+        record_id, _ = pending.popleft()
+        write(_result(record_id, outcome, seconds))
+        while pending and pending[0][1] is not None:
+            write(_result(*pending.popleft(), 0.0))
+
+
+def _result(record_id: object, outcome: tuple | Exception, seconds: float) -> dict:
+    if isinstance(outcome, Exception):
+        letters, path, error = None, None, str(outcome)
+    else:
+        (letters, path), error = outcome, None
+    return {
+        "id": record_id,
+        "letters": letters,
+        "path": path,
+        "error": error,
+        "seconds": seconds,
+    }
+
+
 if __name__ == "__main__":
     main()
@@ -1,10 +1,111 @@
+import os
+from typing import TextIO
+
+import saona.grid
+import saona.metrics
 import saona.preprocessor
 import saona.road_map
 import saona.path_finder
+import saona.run_length
+import saona.tiled
+import saona.util
+from saona.batch import iter_traverse_many, traverse_as_completed, traverse_many
+from saona.cache import TraversalCache
+from saona.compiler import compile_map
+from saona.precompiled import load_compiled, save_compiled
+from saona.prepared import PreparedMap
+from saona.run_length import RunLengthPath
+from saona.session import MapSession
+
+
+def traverse(
+    grid_str: str,
+    metrics: saona.metrics.TraversalMetrics | None = None,
+    validate: str = "strict",
+    compact: bool = False,
+    *,
+    max_steps: int | None = None,
+    deadline: float | None = None,
+    cancel: saona.util.CancellationToken | None = None,
+    max_path_length: int | None = None,
+) -> tuple[str, str | saona.run_length.RunLengthPath]:
+    """Follow the path in a map, return collected letters and path taken.
+
+    Pass `metrics` to count and time what happens during the traversal.
+    Pass `validate="lazy"` to check only characters the path reaches,
+    see `saona.preprocessor.process`.
+    Pass `compact=True` to get the path as a `RunLengthPath`.
+    Pass `max_steps`, `deadline`, `cancel` or `max_path_length` to stop
+    walking untrusted maps early, see `PathFinder.follow_path`.
+    """
+    limits = {
+        "max_steps": max_steps,
+        "deadline": deadline,
+        "cancel": cancel,
+        "max_path_length": max_path_length,
+    }
+    if metrics is not None:
+        return saona.metrics.traverse_with_metrics(
+            grid_str, metrics, validate, compact, **limits
+        )
+    grid, initial_position = saona.preprocessor.process(
+        grid_str, backend="flat", validate=validate
+    )
+    return _follow_path(grid, initial_position, compact, **limits)
+
+
+def traverse_buffer(buffer: bytes | memoryview) -> tuple[str, str]:
+    """Same as `traverse`, but for a map encoded as UTF-8 bytes."""
+    grid, initial_position = saona.preprocessor.process_buffer(buffer)
+    return _follow_path(grid, initial_position)
+
 
+def traverse_file(
+    path: str | os.PathLike, memory_budget: int | None = None
+) -> tuple[str, str]:
+    """Same as `traverse`, but for a map stored in a file, optionally gzip compressed.
 
-def traverse(grid_str: str) -> tuple[str, str]:
-    grid, initial_position = saona.preprocessor.process(grid_str)
+    Pass `memory_budget` in bytes to read the map in tiles as the path reaches them,
+    for maps which don't fit into memory. Compressed maps can't be read in tiles.
+    """
+    if memory_budget is None:
+        grid, initial_position = saona.preprocessor.process_file(path)
+        return _follow_path(grid, initial_position)
+    grid, initial_position = saona.preprocessor.process_file(
+        path, backend="tiled", memory_budget=memory_budget
+    )
+    with grid:
+        return _follow_path(grid, initial_position)
+
+
+def traverse_to(
+    grid_str: str, stream: TextIO, batch_size: int = 4096, **limits
+) -> str:
+    """Same as `traverse`, but path taken is written to `stream` as it is followed.
+
+    Only collected letters are returned. Path is written in pieces of about
+    `batch_size` moves, so memory doesn't grow with the length of the path.
+    Stream can be any object with method `write` accepting strings,
+    for example a text file or a socket wrapped by `socket.makefile("w")`.
+    If `PathError` is raised, the path leading to the problem was already written.
+    Limits are the same as in `traverse`.
+    """
+    grid, initial_position = saona.preprocessor.process(grid_str, backend="flat")
     road_map = saona.road_map.RoadMap(grid, initial_position)
     path_finder = saona.path_finder.PathFinder()
-    return path_finder.follow_path(road_map)
+    letters = []
+    for path, new_letters in path_finder.iter_path(road_map, batch_size, **limits):
+        stream.write(path)
+        letters.append(new_letters)
+    return "".join(letters)
+
+
+def _follow_path(
+    grid: saona.grid.FlatGrid | saona.tiled.TiledGrid,
+    initial_position: tuple[int, int],
+    compact: bool = False,
+    **limits,
+) -> tuple[str, str | saona.run_length.RunLengthPath]:
+    road_map = saona.road_map.RoadMap(grid, initial_position)
+    path_finder = saona.path_finder.PathFinder(compact)
+    return path_finder.follow_path(road_map, **limits)
@@ -0,0 +1,114 @@
+import collections
+import concurrent.futures
+import itertools
+import os
+import time
+from typing import Iterable, Iterator
+
+import saona
+from saona.util import PathError
+
+__all__ = (
+    "iter_traverse_many",
+    "traverse_as_completed",
+    "traverse_many",
+    "traverse_one",
+)
+
+TraverseResult = tuple[str, str] | PathError
+
+
+def traverse_many(
+    grids: Iterable[str], workers: int | None = None, chunksize: int = 1, **options
+) -> list[TraverseResult]:
+    """Traverse many maps in parallel, using a pool of `workers` processes.
+
+    Results are in the same order as maps.
+    Each result is either collected letters and path taken,
+    or `PathError` if it was impossible to follow the path.
+    Maps are sent to workers in chunks of `chunksize` maps,
+    larger chunks are better when there are many small maps.
+    Other keyword arguments, such as `validate`, `compact` or `max_steps`,
+    are passed to `saona.traverse` for every map.
+    """
+    return list(iter_traverse_many(grids, workers, chunksize, **options))
+
+
+def iter_traverse_many(
+    grids: Iterable[str],
+    workers: int | None = None,
+    chunksize: int = 1,
+    timed: bool = False,
+    **options,
+) -> Iterator[TraverseResult] | Iterator[tuple[TraverseResult, float]]:
+    """Same as `traverse_many`, but results are yielded as soon as they are ready.
+
+    Maps are consumed lazily, only a few chunks per worker are in flight at once.
+    If `timed` is true, every result is paired with seconds it took to traverse
+    the map in a worker.
+    """
+    workers = workers or os.process_cpu_count()
+    with _create_pool(workers) as pool:
+        pending = collections.deque()
+        for chunk in itertools.batched(grids, chunksize):
+            pending.append(pool.submit(_traverse_chunk, chunk, timed, options))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def traverse_as_completed(
+    grids: Iterable[str], workers: int | None = None, chunksize: int = 1, **options
+) -> Iterator[tuple[int, TraverseResult]]:
+    """Same as `iter_traverse_many`, but results are yielded in completion order.
+
+    Every result is paired with an index of its map.
+    """
+    workers = workers or os.process_cpu_count()
+    with _create_pool(workers) as pool:
+        pending = {}
+        grid_idx = 0
+        for chunk in itertools.batched(grids, chunksize):
+            pending[pool.submit(_traverse_chunk, chunk, False, options)] = grid_idx
+            grid_idx += len(chunk)
+            if len(pending) >= 2 * workers:
+                yield from _pop_completed(pending)
+        while pending:
+            yield from _pop_completed(pending)
+
+
+def _create_pool(workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+
+
+def _pop_completed(pending: dict) -> Iterator[tuple[int, TraverseResult]]:
+    done, _ = concurrent.futures.wait(
+        pending, return_when=concurrent.futures.FIRST_COMPLETED
+    )
+    for future in done:
+        first_idx = pending.pop(future)
+        yield from enumerate(future.result(), start=first_idx)
+
+
+def _traverse_chunk(grids: tuple[str, ...], timed: bool, options: dict) -> list:
+    if not timed:
+        return [traverse_one(grid_str, **options) for grid_str in grids]
+    results = []
+    for grid_str in grids:
+        started = time.perf_counter()
+        result = traverse_one(grid_str, **options)
+        results.append((result, time.perf_counter() - started))
+    return results
+
+
+def traverse_one(grid_str: str, **options) -> TraverseResult:
+    """Same as `saona.traverse`, but `PathError` is returned instead of raised.
+
+    Used by workers of a pool, where returned errors are easy to tell apart
+    from failures of the pool itself.
+    """
+    try:
+        return saona.traverse(grid_str, **options)
+    except PathError as e:
+        return e
@@ -0,0 +1,215 @@
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+import saona
+import saona.util
+from saona.run_length import RunLengthPath
+from saona.util import DeadlineExceeded, PathError, TraversalCancelled
+
+__all__ = ("TraversalCache",)
+
+# letters, path, name of the error type and JSON arguments of the error
+Entry = tuple[str, str, str | None, str | None]
+
+# characters of a map encoded at once while hashing it
+_HASH_CHUNK = 1 << 20
+
+_ERRORS = {
+    error_type.__name__: error_type
+    for error_type in vars(saona.util).values()
+    if isinstance(error_type, type) and issubclass(error_type, PathError)
+}
+
+
+class TraversalCache:
+    """Cache of `saona.traverse` results, keyed by a hash of the map.
+
+    Maps are normalized before hashing, trailing spaces and empty rows
+    don't change the result, so they are ignored.
+    Both successful results and `PathError` outcomes are cached, errors
+    are raised again with the same type. Options of `saona.traverse` are a part
+    of the key, except `deadline` and `cancel`, whose errors are never cached.
+
+    Results are kept in memory and the least recently used ones are evicted
+    when there are more than `max_entries` results or they take more than `max_bytes`.
+    If `path` is provided, results are also stored in a sqlite database,
+    which survives restarts. It is checked when result is not in memory.
+
+    Attributes `hits`, `disk_hits`, `misses` and `evictions` count what happened,
+    method `stats` returns them along with the current size of the cache.
+
+    The cache can be shared between threads. Maps are traversed outside
+    of its lock, so a map missing in the cache may be traversed more than once.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        path: str | os.PathLike | None = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            # every use of the connection holds the lock
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results"
+                " (key TEXT PRIMARY KEY, letters TEXT, path TEXT,"
+                " error_type TEXT, error_args TEXT)"
+            )
+
+    def traverse(
+        self,
+        grid_str: str,
+        validate: str = "strict",
+        compact: bool = False,
+        *,
+        max_steps: int | None = None,
+        deadline: float | None = None,
+        cancel: saona.util.CancellationToken | None = None,
+        max_path_length: int | None = None,
+    ) -> tuple[str, str | RunLengthPath]:
+        """Same as `saona.traverse`, but results are cached."""
+        grid_str = _normalize(grid_str)
+        options = {
+            "validate": validate,
+            "compact": compact,
+            "max_steps": max_steps,
+            "max_path_length": max_path_length,
+        }
+        key = _key(grid_str, options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            else:
+                entry = self._load(key)
+                if entry is not None:
+                    self.disk_hits += 1
+                    self._remember(key, entry)
+                else:
+                    self.misses += 1
+        if entry is None:
+            entry = _traverse(grid_str, **options, deadline=deadline, cancel=cancel)
+            with self._lock:
+                self._store(key, entry)
+                self._remember(key, entry)
+        letters, path, error_type, error_args = entry
+        if error_type is not None:
+            raise _ERRORS[error_type](*_from_json(error_args))
+        return letters, RunLengthPath.from_str(path) if compact else path
+
+    def stats(self) -> dict[str, int]:
+        """Counters and the current size of the in-memory cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def clear(self):
+        """Forget all results kept in memory, results on disk are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def close(self):
+        """Close the database, if there is one."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _remember(self, key: str, entry: Entry):
+        # another thread may have traversed the same map meanwhile
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= _entry_size(previous)
+        self._entries[key] = entry
+        self._bytes += _entry_size(entry)
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= _entry_size(evicted)
+            self.evictions += 1
+
+    def _load(self, key: str) -> Entry | None:
+        if self._db is None:
+            return None
+        return self._db.execute(
+            "SELECT letters, path, error_type, error_args FROM results WHERE key = ?",
+            (key,),
+        ).fetchone()
+
+    def _store(self, key: str, entry: Entry):
+        if self._db is None:
+            return
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", (key, *entry)
+            )
+
+
+def _normalize(grid_str: str) -> str:
+    # most maps have nothing to strip, those are not copied
+    if " \n" not in grid_str and not grid_str.endswith((" ", "\n")):
+        return grid_str
+    return "\n".join(row.rstrip(" ") for row in grid_str.split("\n")).rstrip("\n")
+
+
+def _key(grid_str: str, options: dict) -> str:
+    # a large map is encoded in chunks, not copied as a whole
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{json.dumps(options, sort_keys=True)}\n".encode())
+    for start in range(0, len(grid_str), _HASH_CHUNK):
+        digest.update(grid_str[start : start + _HASH_CHUNK].encode())
+    return digest.hexdigest()
+
+
+def _traverse(grid_str: str, **options) -> Entry:
+    try:
+        letters, path = saona.traverse(grid_str, **options)
+    except (DeadlineExceeded, TraversalCancelled):
+        # depend on the time or the caller, not on the map
+        raise
+    except PathError as e:
+        error_type, error_args = e.__reduce__()[:2]
+        return "", "", error_type.__name__, json.dumps(error_args)
+    return letters, str(path), None, None
+
+
+def _from_json(error_args: str) -> list:
+    # positions of limit errors come back as lists
+    return [
+        tuple(arg) if isinstance(arg, list) else arg for arg in json.loads(error_args)
+    ]
+
+
+def _entry_size(entry: Entry) -> int:
+    return sum(sys.getsizeof(value) for value in entry)
@@ -0,0 +1,94 @@
+from saona.path_finder import PathFinder
+from saona.preprocessor import process
+from saona.road_map import RoadMap
+from saona.util import HORIZONTAL, START, VERTICAL, PathError
+
+__all__ = ("CompiledMap", "compile_map")
+
+Edge = tuple[tuple[int, int], tuple[int, int], str, str]
+
+
+class CompiledMap:
+    """Path of a map compiled into a graph.
+
+    Nodes are positions where something happens: start, end, junctions,
+    turns, letters and tunnel entries. Attribute `nodes` maps each node
+    position to its character.
+    Attribute `edges` holds edges in the order they are followed.
+    Each edge is a tuple of source position, target position,
+    path taken from source to target (including the target character)
+    and letters collected on the way (including the target letter).
+
+    If path can't be followed, there are only edges leading to the problem
+    and `traverse` raises `PathError`. If the map itself is invalid,
+    there are no nodes nor edges.
+
+    `CompiledMap` only holds plain data, so it can be pickled and reused.
+    """
+
+    def __init__(
+        self, nodes: dict[tuple[int, int], str], edges: list[Edge], error: str | None
+    ):
+        self.nodes = nodes
+        self.edges = edges
+        self.error = error
+        # edges are joined once, not on every call of `traverse`
+        self._result = (
+            "".join(edge[3] for edge in edges),
+            START + "".join(edge[2] for edge in edges),
+        )
+
+    def traverse(self) -> tuple[str, str]:
+        """Same as `saona.traverse`, but without walking the map again."""
+        if self.error is not None:
+            raise PathError(self.error)
+        return self._result
+
+
+def compile_map(grid_str: str) -> CompiledMap:
+    """Follow a path once and compile it into a `CompiledMap`.
+
+    Never raises `PathError`, errors are raised by `CompiledMap.traverse`.
+    """
+    try:
+        grid, initial_position = process(grid_str, backend="flat")
+    except PathError as e:
+        return CompiledMap({}, [], str(e))
+    return _CompilingPathFinder().compile(RoadMap(grid, initial_position))
+
+
+class _CompilingPathFinder(PathFinder):
+    """`PathFinder` which records nodes and edges while following a path."""
+
+    def compile(self, road_map: RoadMap) -> CompiledMap:
+        self._nodes = {road_map.position: START}
+        self._edges = []
+        self._source = road_map.position
+        self._edge_start = 1
+        self._edge_letters_start = 0
+        try:
+            self.follow_path(road_map)
+        except PathError as e:
+            return CompiledMap(self._nodes, self._edges, str(e))
+        self._add_node(self._map.cell, len(self._path))
+        return CompiledMap(self._nodes, self._edges, None)
+
+    def _analyze_next_move(self):
+        cell = self._map.cell
+        path_length = len(self._path)
+        super()._analyze_next_move()
+        # Straight lines are not nodes, unless they are an entry to a tunnel.
+        if self._map.char_at(cell) not in (HORIZONTAL, VERTICAL) or (
+            self._map.cell != cell
+        ):
+            self._add_node(cell, path_length)
+
+    def _add_node(self, cell: int, path_length: int):
+        position = self._map.position_of(cell)
+        self._nodes[position] = self._map.char_at(cell)
+        path = "".join(self._path[self._edge_start : path_length])
+        letters = self._letters.get(self._edge_letters_start)
+        self._edges.append((self._source, position, path, letters))
+        self._source = position
+        self._edge_start = path_length
+        self._edge_letters_start = len(self._letters)
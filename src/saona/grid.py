@@ -0,0 +1,426 @@
+import re
+from array import array
+from typing import Sequence
+
+__all__ = ("Bitset", "ChunkedBitset", "FlatGrid", "SparseGrid")
+
+# Code 0 is reserved for unusable cells, ASCII characters are their own code.
+_ASCII_SYMBOLS = [""] + [chr(code) for code in range(1, 128)]
+
+
+class FlatGrid:
+    """Readonly 2D grid of characters stored in one contiguous buffer.
+
+    Every cell is identified by an integer cell id.
+    Rows are stored one after another with a fixed stride and the grid is
+    surrounded by a border of unusable cells, so a neighbour of any cell
+    inside the grid is still a valid cell id.
+
+    Each cell holds a symbol code and `symbols[code]` is the character in the cell.
+    Code 0 means that cell is unusable and its symbol is an empty string.
+    ASCII characters are stored as their own code, any other character gets
+    the next free code. Cells are stored as bytes until there are more than
+    256 different symbols, after that 2 bytes are used per cell.
+    """
+
+    def __init__(self, cells, symbols: list[str], rows: int, columns: int):
+        self.cells = cells
+        self.symbols = symbols
+        self.rows = rows
+        self.columns = columns
+        self.stride = columns + 2
+        self._codes = {symbol: code for code, symbol in enumerate(symbols)}
+
+    @classmethod
+    def empty(cls, rows: int, columns: int) -> "FlatGrid":
+        """Create a grid where all cells are unusable."""
+        cells = bytearray((rows + 2) * (columns + 2))
+        return cls(cells, list(_ASCII_SYMBOLS), rows, columns)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[str]], blank: str = "") -> "FlatGrid":
+        """Create a grid from a jagged 2D array of characters.
+
+        Rows can also be strings. Every cell equal to `blank` becomes unusable.
+        """
+        columns = max((len(row) for row in rows), default=0)
+        grid = cls.empty(len(rows), columns)
+        for row_idx, row in enumerate(rows):
+            grid.fill_row(row_idx, row, blank)
+        return grid
+
+    def fill_row(self, row_idx: int, row: Sequence[str] | bytes, blank: str = ""):
+        """Write characters of a row, starting from the first column.
+
+        Row can also be ASCII encoded bytes.
+        """
+        start = self.cell_id((row_idx, 0))
+        if isinstance(row, str) and row.isascii():
+            row = row.encode("ascii")
+        if isinstance(row, bytes) and not isinstance(self.cells, array):
+            if blank:
+                row = row.replace(blank.encode("ascii"), b"\0")
+            self.cells[start : start + len(row)] = row
+            return
+        if isinstance(row, bytes):
+            row = row.decode("ascii")
+        for col_idx, char in enumerate(row):
+            self.cells[start + col_idx] = 0 if char == blank else self.code(char)
+
+    def code(self, symbol: str) -> int:
+        """Get a code of the symbol, new symbols are assigned a new code."""
+        code = self._codes.get(symbol)
+        if code is None:
+            code = len(self.symbols)
+            if code == 256:
+                self.cells = array("H", iter(self.cells))
+            self.symbols.append(symbol)
+            self._codes[symbol] = code
+        return code
+
+    def run_end(self, cell: int, offset: int) -> int:
+        """Find the last cell of a run of identical characters.
+
+        Run starts at the cell and continues while moving by offset
+        (which is 1 or stride, possibly negative) finds the same character.
+        """
+        code = self.cells[cell]
+        if offset == 1 and not isinstance(self.cells, array):
+            return _same_code_pattern(code).match(self.cells, cell).end() - 1
+        while self.cells[cell + offset] == code:
+            cell += offset
+        return cell
+
+    def text(self, start: int, stop: int, step: int) -> str:
+        """Characters of cells `range(start, stop, step)`, all have to be usable."""
+        codes = self.cells[start:stop:step]
+        if not isinstance(codes, array) and codes.isascii():
+            return codes.decode("ascii")
+        return "".join(self.symbols[code] for code in codes)
+
+    def cell_id(self, position: tuple[int, int]) -> int:
+        """Convert a position to a cell id.
+
+        Positions outside of the grid and its border all map to cell 0,
+        which is always unusable.
+        """
+        row_idx, col_idx = position
+        if -1 <= row_idx <= self.rows and -1 <= col_idx <= self.columns:
+            return (row_idx + 1) * self.stride + col_idx + 1
+        return 0
+
+    def position(self, cell: int) -> tuple[int, int]:
+        """Convert a cell id back to a position."""
+        row_idx, col_idx = divmod(cell, self.stride)
+        return row_idx - 1, col_idx - 1
+
+    def cell_set(self) -> "Bitset":
+        """Empty set for cell ids of this grid."""
+        return Bitset(len(self))
+
+    def __len__(self):
+        """Number of cells, including the border."""
+        return len(self.cells)
+
+    def __getitem__(self, cell: int) -> str:
+        """Retrieve a character in the cell, empty string if cell is unusable."""
+        return self.symbols[self.cells[cell]]
+
+
+class SparseGrid:
+    """Readonly 2D grid of characters which stores only usable cells.
+
+    Cells are stored in chunks of 16x16 cells, kept in dictionary `chunks`
+    keyed by chunk coordinates packed into one integer. Chunks without
+    any usable cell are never created, lookups there find unusable cells,
+    so memory grows with the number of usable cells, not with the area.
+
+    Cell ids and symbol codes work the same as in `FlatGrid`, except that
+    stride is a power of two, so the chunk of a cell is found by shifting bits.
+    """
+
+    def __init__(self, rows: int, columns: int):
+        self.rows = rows
+        self.columns = columns
+        # at least 64 columns, so a row of `ChunkedBitset` holds whole chunks
+        self._column_bits = max(6, (columns + 1).bit_length())
+        self._column_mask = (1 << self._column_bits) - 1
+        self.stride = 1 << self._column_bits
+        self.symbols = list(_ASCII_SYMBOLS)
+        self.chunks = {}
+        self._codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[str], blank: str = " ") -> "SparseGrid":
+        """Create a grid from rows of characters, `blank` marks unusable cells."""
+        grid = cls(len(rows), max((len(row) for row in rows), default=0))
+        for row_idx, row in enumerate(rows):
+            grid.fill_row(row_idx, row, blank)
+        return grid
+
+    def fill_row(self, row_idx: int, row: str, blank: str = " "):
+        """Write characters of a row, starting from the first column.
+
+        Only parts of the row around characters other than `blank` are written.
+        """
+        for match in _filled_part_pattern(blank).finditer(row):
+            self._fill(self.cell_id((row_idx, match.start())), match.group(), blank)
+
+    def _fill(self, cell: int, text: str, blank: str):
+        if text.isascii() and len(self.symbols) <= 256:
+            codes = text.encode("ascii").replace(blank.encode("ascii"), b"\0")
+        else:
+            codes = [0 if char == blank else self.code(char) for char in text]
+        # one piece of codes for every chunk the text crosses
+        start = 0
+        while start < len(codes):
+            stop = min(len(codes), start + 16 - (cell & 15))
+            key, offset = self._locate(cell)
+            chunk = self._chunk(key)
+            piece = _as_chunk_type(chunk, codes[start:stop])
+            chunk[offset : offset + len(piece)] = piece
+            cell += stop - start
+            start = stop
+
+    def _chunk(self, key: int):
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = bytearray(16 * 16)
+            if len(self.symbols) > 256:
+                chunk = array("H", iter(chunk))
+            self.chunks[key] = chunk
+        return chunk
+
+    def _locate(self, cell: int) -> tuple[int, int]:
+        # key of the chunk with the cell and offset of the cell in the chunk
+        key = cell >> self._column_bits + 4 << self._column_bits
+        key |= (cell & self._column_mask) >> 4
+        return key, (cell >> self._column_bits & 15) << 4 | cell & 15
+
+    def code(self, symbol: str) -> int:
+        """Get a code of the symbol, new symbols are assigned a new code."""
+        code = self._codes.get(symbol)
+        if code is None:
+            code = len(self.symbols)
+            if code == 256:
+                for key, chunk in self.chunks.items():
+                    self.chunks[key] = array("H", iter(chunk))
+            self.symbols.append(symbol)
+            self._codes[symbol] = code
+        return code
+
+    def run_end(self, cell: int, offset: int) -> int:
+        """Same as `FlatGrid.run_end`."""
+        char = self[cell]
+        while self[cell + offset] == char:
+            cell += offset
+        return cell
+
+    def text(self, start: int, stop: int, step: int) -> str:
+        """Same as `FlatGrid.text`."""
+        return "".join([self[cell] for cell in range(start, stop, step)])
+
+    def cell_id(self, position: tuple[int, int]) -> int:
+        """Same as `FlatGrid.cell_id`."""
+        row_idx, col_idx = position
+        if -1 <= row_idx <= self.rows and -1 <= col_idx <= self.columns:
+            return (row_idx + 1) << self._column_bits | col_idx + 1
+        return 0
+
+    def position(self, cell: int) -> tuple[int, int]:
+        """Same as `FlatGrid.position`."""
+        return (cell >> self._column_bits) - 1, (cell & self._column_mask) - 1
+
+    def cell_set(self) -> "ChunkedBitset":
+        """Empty set for cell ids of this grid, allocated in chunks."""
+        return ChunkedBitset(len(self), self.stride)
+
+    def __len__(self):
+        """Number of cell ids, including the border and unused columns."""
+        return (self.rows + 2) << self._column_bits
+
+    def __getitem__(self, cell: int) -> str:
+        """Retrieve a character in the cell, empty string if cell is unusable."""
+        chunk = self.chunks.get(
+            cell >> self._column_bits + 4 << self._column_bits
+            | (cell & self._column_mask) >> 4
+        )
+        if chunk is None:
+            return ""
+        return self.symbols[chunk[(cell >> self._column_bits & 15) << 4 | cell & 15]]
+
+
+class Bitset:
+    """Set of integers from `range(size)`, packed into one bit per integer.
+
+    Integer `idx` is bit `idx & 7` of byte `idx >> 3` of bytearray `bits`,
+    hot loops can read and set bits there directly, avoiding method calls.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.bits = bytearray((size + 7) >> 3)
+
+    def add(self, idx: int) -> bool:
+        """Add an integer, return whether it was already in the set."""
+        byte_idx = idx >> 3
+        byte = self.bits[byte_idx]
+        mask = 1 << (idx & 7)
+        self.bits[byte_idx] = byte | mask
+        return bool(byte & mask)
+
+    def discard(self, idx: int):
+        """Remove an integer, if it is in the set."""
+        self.bits[idx >> 3] &= ~(1 << (idx & 7))
+
+    def add_range(self, start: int, stop: int, step: int = 1) -> bool:
+        """Add all integers of `range(start, stop, step)`.
+
+        Returns whether all of them were already in the set.
+        """
+        bits = self.bits
+        if step != 1:
+            # only bits up to the first missing one have to be checked
+            for idx in range(start, stop, step):
+                if not bits[idx >> 3] >> (idx & 7) & 1:
+                    break
+            else:
+                return True
+            for idx in range(idx, stop, step):
+                bits[idx >> 3] |= 1 << (idx & 7)
+            return False
+        if start >= stop:
+            return True
+        # partial first and last bytes are masked, full bytes between are set at once
+        first, last = start >> 3, (stop - 1) >> 3
+        first_mask = 0xFF << (start & 7) & 0xFF
+        last_mask = 0xFF >> (7 - ((stop - 1) & 7))
+        if first == last:
+            first_mask &= last_mask
+        missing = first_mask & ~bits[first]
+        bits[first] |= first_mask
+        if first != last:
+            missing |= last_mask & ~bits[last]
+            bits[last] |= last_mask
+            filled = b"\xff" * (last - first - 1)
+            missing |= bits[first + 1 : last] != filled
+            bits[first + 1 : last] = filled
+        return not missing
+
+    def clear(self):
+        """Remove all integers, without allocating a new buffer."""
+        bits = self.bits
+        for start in range(0, len(bits), len(_ZEROS)):
+            bits[start : start + len(_ZEROS)] = _ZEROS[: len(bits) - start]
+
+    def scaled(self, factor: int) -> "Bitset":
+        """Empty set of the same kind, for integers up to `factor` times larger."""
+        return Bitset(self.size * factor)
+
+    def __contains__(self, idx: int) -> bool:
+        return bool(self.bits[idx >> 3] >> (idx & 7) & 1)
+
+    def __len__(self):
+        """Number of integers in the set."""
+        return int.from_bytes(self.bits, "little").bit_count()
+
+
+class ChunkedBitset(Bitset):
+    """`Bitset` which allocates memory only for chunks where integers are added.
+
+    Integers are laid out in rows of `width` integers, a power of two
+    which is at least 64. A chunk holds bits of 16 rows by 64 integers,
+    so cell ids of a `SparseGrid` which are close in 2D share chunks.
+
+    Attribute `bits` can be indexed by byte like a bytearray,
+    bytes of chunks which were never written are 0.
+    """
+
+    def __init__(self, size: int, width: int):
+        self.size = size
+        self.width = width
+        self.bits = _ChunkedBytes(width >> 3)
+
+    def add_range(self, start: int, stop: int, step: int = 1) -> bool:
+        """Same as `Bitset.add_range`."""
+        if step != 1:
+            return super().add_range(start, stop, step)
+        bits = self.bits
+        missing = 0
+        # byte by byte, a range can cross many chunks
+        while start < stop:
+            byte_idx = start >> 3
+            end = min(stop, byte_idx + 1 << 3)
+            mask = 0xFF >> 8 - (end - start) << (start & 7)
+            byte = bits[byte_idx]
+            missing |= mask & ~byte
+            bits[byte_idx] = byte | mask
+            start = end
+        return not missing
+
+    def clear(self):
+        """Remove all integers, freeing all chunks."""
+        self.bits.chunks.clear()
+
+    def scaled(self, factor: int) -> "ChunkedBitset":
+        """Empty set of the same kind, for integers up to `factor` times larger."""
+        return ChunkedBitset(self.size * factor, self.width * factor)
+
+    def __len__(self):
+        """Number of integers in the set."""
+        return sum(
+            int.from_bytes(chunk, "little").bit_count()
+            for chunk in self.bits.chunks.values()
+        )
+
+
+class _ChunkedBytes:
+    """Bytes in rows of `row_bytes`, stored in chunks of 16 rows by 8 bytes."""
+
+    def __init__(self, row_bytes: int):
+        self.chunks = {}
+        self._row_bits = row_bytes.bit_length() - 1
+        self._row_mask = row_bytes - 1
+
+    def __getitem__(self, idx: int) -> int:
+        chunk = self.chunks.get(
+            idx >> self._row_bits + 4 << self._row_bits | (idx & self._row_mask) >> 3
+        )
+        if chunk is None:
+            return 0
+        return chunk[(idx >> self._row_bits & 15) << 3 | idx & 7]
+
+    def __setitem__(self, idx: int, value: int):
+        key = idx >> self._row_bits + 4 << self._row_bits | (idx & self._row_mask) >> 3
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            if not value:
+                return
+            chunk = self.chunks[key] = bytearray(128)
+        chunk[(idx >> self._row_bits & 15) << 3 | idx & 7] = value
+
+
+_ZEROS = bytes(64 * 1024)
+
+_same_code_patterns = {}
+
+
+def _filled_part_pattern(blank: str) -> re.Pattern:
+    # Characters other than blank, together with gaps between them which
+    # are too short to leave a chunk empty, so they are written at once.
+    blank = re.escape(blank)
+    return re.compile(f"[^{blank}](?:{blank}{{0,15}}[^{blank}])*")
+
+
+def _as_chunk_type(chunk: bytearray | array, codes: bytes | list[int]):
+    if isinstance(chunk, array):
+        return array("H", codes if isinstance(codes, list) else iter(codes))
+    return bytes(codes)
+
+
+def _same_code_pattern(code: int) -> re.Pattern:
+    pattern = _same_code_patterns.get(code)
+    if pattern is None:
+        pattern = re.compile(re.escape(bytes([code])) + b"+")
+        _same_code_patterns[code] = pattern
+    return pattern
@@ -0,0 +1,221 @@
+import bisect
+import time
+from typing import Iterable
+
+from saona.grid import FlatGrid, SparseGrid
+from saona.path_finder import PathFinder
+from saona.preprocessor import process
+from saona.road_map import Direction, RoadMap
+from saona.run_length import RunLengthPath
+
+__all__ = (
+    "Histogram",
+    "InstrumentedPathFinder",
+    "InstrumentedRoadMap",
+    "MetricsAggregator",
+    "TraversalMetrics",
+    "traverse_with_metrics",
+)
+
+COUNTERS = (
+    # calls of `RoadMap.move`, `RoadMap.jump_to` and `RoadMap.iter_surroundings`
+    "moves",
+    "jumps",
+    "surroundings",
+    # calls of `PathFinder._use_tunnel` and cells from the turn to the first
+    # unvisited one, the tunnel end, summed over all of them
+    "tunnels",
+    "tunnel_cells",
+    # turns which had to go back to an already visited cell
+    "revisits",
+    # turns with nothing new to visit, checked for repeating a state of a loop
+    "loop_checks",
+    # reads of visited bits, one for every cell checked whether it was visited
+    "visit_checks",
+)
+PHASES = ("preprocess", "build", "walk")
+
+
+class TraversalMetrics:
+    """Counters and timings of a single traversal.
+
+    Attribute `counters` maps every name in `COUNTERS` to a count,
+    attribute `timings` maps every phase in `PHASES` to seconds it took.
+    """
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.timings = dict.fromkeys(PHASES, 0.0)
+
+    def as_dict(self) -> dict[str, int | float]:
+        """All counters and timings in one dictionary, timings have suffix `_s`."""
+        timings = {f"{phase}_s": seconds for phase, seconds in self.timings.items()}
+        return {**self.counters, **timings}
+
+
+class InstrumentedRoadMap(RoadMap):
+    """`RoadMap` which counts how it is used into `TraversalMetrics`.
+
+    Plain `RoadMap` is not slowed down at all, only this subclass counts.
+    """
+
+    def __init__(
+        self,
+        grid: list[list[str]] | FlatGrid | SparseGrid,
+        initial_position: tuple[int, int],
+        metrics: TraversalMetrics,
+    ):
+        super().__init__(grid, initial_position)
+        self._counters = metrics.counters
+        self._visited_bits = _CountingBits(self._visited_bits, self._counters)
+
+    def move(self, direction: Direction) -> str:
+        self._counters["moves"] += 1
+        return super().move(direction)
+
+    def jump_to_cell(self, cell: int) -> str:
+        self._counters["jumps"] += 1
+        return super().jump_to_cell(cell)
+
+    def iter_surrounding_cells(self) -> Iterable[tuple[Direction, int]]:
+        self._counters["surroundings"] += 1
+        return super().iter_surrounding_cells()
+
+    def next_unvisited_cell(self, cell: int, direction: Direction) -> int:
+        # Visited cells are jumped over, but they still count as scanned.
+        found = super().next_unvisited_cell(cell, direction)
+        self._counters["tunnel_cells"] += (found - cell) // self._offsets[direction]
+        return found
+
+
+class _CountingBits:
+    """Visited bits of `RoadMap`, counting reads into counter `visit_checks`."""
+
+    def __init__(self, bits: bytearray, counters: dict[str, int]):
+        self._bits = bits
+        self._counters = counters
+
+    def __getitem__(self, idx: int) -> int:
+        self._counters["visit_checks"] += 1
+        return self._bits[idx]
+
+    def __setitem__(self, idx: int, value: int):
+        self._bits[idx] = value
+
+
+class InstrumentedPathFinder(PathFinder):
+    """`PathFinder` which counts what it does into `TraversalMetrics`.
+
+    It has to be used with `InstrumentedRoadMap`.
+    """
+
+    def __init__(self, metrics: TraversalMetrics, compact: bool = False):
+        super().__init__(compact)
+        self._counters = metrics.counters
+
+    def _use_tunnel(self, direction: Direction) -> bool:
+        self._counters["tunnels"] += 1
+        return super()._use_tunnel(direction)
+
+    def _set_next_direction(self, revisit=False) -> bool:
+        found = super()._set_next_direction(revisit)
+        if revisit:
+            self._counters["revisits"] += 1
+        return found
+
+    def _check_for_cycle(self):
+        self._counters["loop_checks"] += 1
+        super()._check_for_cycle()
+
+
+def traverse_with_metrics(
+    grid_str: str,
+    metrics: TraversalMetrics,
+    validate: str = "strict",
+    compact: bool = False,
+    **limits,
+) -> tuple[str, str | RunLengthPath]:
+    """Same as `saona.traverse`, but counts and times everything into `metrics`.
+
+    Limits are passed to `PathFinder.follow_path`.
+    """
+    started = time.perf_counter()
+    try:
+        grid, initial_position = process(grid_str, backend="flat", validate=validate)
+    finally:
+        built = time.perf_counter()
+        metrics.timings["preprocess"] = built - started
+    road_map = InstrumentedRoadMap(grid, initial_position, metrics)
+    walking = time.perf_counter()
+    metrics.timings["build"] = walking - built
+    try:
+        path_finder = InstrumentedPathFinder(metrics, compact)
+        return path_finder.follow_path(road_map, **limits)
+    finally:
+        metrics.timings["walk"] = time.perf_counter() - walking
+
+
+class Histogram:
+    """Counts of observed values in buckets with upper bounds `bounds`.
+
+    There is an additional bucket for values larger than the last bound.
+    """
+
+    def __init__(self, bounds: list[float]):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self) -> dict:
+        """Count, sum and cumulative counts of values up to each bound."""
+        cumulative = {}
+        total = 0
+        for bound, count in zip([*self.bounds, float("inf")], self.buckets):
+            total += count
+            cumulative[bound] = total
+        return {"count": self.count, "sum": self.sum, "buckets": cumulative}
+
+
+# Counters grow with map size, timings range from microseconds to minutes.
+COUNTER_BOUNDS = [0] + [2**exponent for exponent in range(31)]
+TIMING_BOUNDS = [2**exponent for exponent in range(-20, 7)]
+
+
+class MetricsAggregator:
+    """Aggregates metrics of many traversals into histograms.
+
+    Meant to live as long as the process does, use `export` or `to_prometheus`
+    to get a snapshot of all histograms.
+    """
+
+    def __init__(self):
+        self.histograms = {name: Histogram(COUNTER_BOUNDS) for name in COUNTERS}
+        for phase in PHASES:
+            self.histograms[f"{phase}_s"] = Histogram(TIMING_BOUNDS)
+
+    def record(self, metrics: TraversalMetrics):
+        for name, value in metrics.as_dict().items():
+            self.histograms[name].observe(value)
+
+    def export(self) -> dict[str, dict]:
+        """Snapshot of all histograms as plain data."""
+        return {name: hist.as_dict() for name, hist in self.histograms.items()}
+
+    def to_prometheus(self, prefix: str = "saona") -> str:
+        """Snapshot of all histograms in Prometheus text exposition format."""
+        lines = []
+        for name, exported in self.export().items():
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in exported["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{le="{le}"}} {count}')
+            lines.append(f"{metric}_sum {exported['sum']}")
+            lines.append(f"{metric}_count {exported['count']}")
+        return "\n".join(lines) + "\n"
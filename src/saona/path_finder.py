@@ -1,56 +1,300 @@
+import math
+import time
+from typing import Iterator
+
 from saona.road_map import Direction, RoadMap
-from saona.util import END, HORIZONTAL, START, TURN, VERTICAL, PathError
+from saona.run_length import RunLengthPath, _RunLengthBuilder
+from saona.util import (
+    END,
+    HORIZONTAL,
+    START,
+    TURN,
+    VERTICAL,
+    CancellationToken,
+    DeadlineExceeded,
+    PathError,
+    PathLengthExceeded,
+    StepLimitExceeded,
+    TraversalCancelled,
+)
+
+# Limits are checked at least once every this many parts of the path.
+_LIMIT_CHECK_INTERVAL = 512
+
+
+class _RunTooLong(Exception):
+    """Raised while walking, `_walk_limited` raises `PathLengthExceeded` instead."""
+
+    def __init__(self, pending: int):
+        super().__init__(pending)
+        self.pending = pending
 
 
 class LetterCollector:
-    """Collection used to track visited letters."""
+    """Collection used to track visited letters.
+
+    Method `collect` ignores a letter at an already collected position.
+    `PathFinder` uses `append` instead, it knows from `RoadMap`
+    whether the cell with a letter was visited before,
+    so positions are not kept twice.
+    """
 
     def __init__(self):
         self._letters = []
         self._positions = set()
 
-    def collect(self, position: tuple[int, int], letter: str):
+    def collect(self, position: tuple[int, int] | int, letter: str):
         if position not in self._positions:
             self._positions.add(position)
             self._letters.append(letter)
 
-    def get(self) -> str:
-        return "".join(self._letters)
+    def append(self, letter: str):
+        """Collect a letter which is known to be at a new position."""
+        self._letters.append(letter)
+
+    def truncate(self, length: int):
+        """Forget all letters collected after the first `length` letters."""
+        del self._letters[length:]
+
+    def get(self, start: int = 0) -> str:
+        """Collected letters, optionally only those after the first `start` letters."""
+        return "".join(self._letters[start:])
+
+    def __len__(self):
+        return len(self._letters)
 
 
 class PathFinder:
-    """Object used to follow a path."""
+    """Object used to follow a path.
+
+    If `compact` is true, `follow_path` returns the path taken as a
+    `RunLengthPath`, which is built from runs as they are walked.
+    """
 
-    def follow_path(self, road_map: RoadMap) -> tuple[str, str]:
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+
+    def follow_path(
+        self,
+        road_map: RoadMap,
+        direction: Direction | None = None,
+        *,
+        max_steps: int | None = None,
+        deadline: float | None = None,
+        cancel: CancellationToken | None = None,
+        max_path_length: int | None = None,
+    ) -> tuple[str, str | RunLengthPath]:
         """Use provided road map to follow a path.
 
         If path can be succesfully followed till the end,
         `follow_path` returns collected letters and path taken.
 
         If it is impossible to reach the end, `PathError` is raised.
+
+        Path starts at the current cell of the road map, which has to be `@`,
+        and goes in the only direction it can. If `direction` is provided,
+        path can start at any cell other than `x` and goes in that direction.
+        Starting cell is not visited, unless it holds a letter to collect.
+
+        Walking can be limited, every limit raises a different subclass
+        of `TraversalLimitError`:
+            - `max_steps` moves, raises `StepLimitExceeded`
+            - until `deadline`, a `time.monotonic` value, raises `DeadlineExceeded`
+            - until `cancel` is cancelled, raises `TraversalCancelled`
+            - `max_path_length` characters of path, raises `PathLengthExceeded`
+        A step is a move, a straight corridor or a tunnel passed at once
+        is a single step no matter how many cells it has.
+        Only the step limit is exact, others are checked every few hundred steps
+        and once more when the end is reached. Long corridors and tunnels are
+        measured before they are added to the path, so it never grows more
+        than about a thousand characters past `max_path_length`.
+        """
+        self._initialize(road_map, direction)
+        if (max_steps, deadline, cancel, max_path_length) == (None,) * 4:
+            return self._walk()
+        return self._walk_limited(max_steps, deadline, cancel, max_path_length)
+
+    def iter_path(
+        self,
+        road_map: RoadMap,
+        batch_size: int = 4096,
+        *,
+        max_steps: int | None = None,
+        deadline: float | None = None,
+        cancel: CancellationToken | None = None,
+        max_path_length: int | None = None,
+    ) -> Iterator[tuple[str, str]]:
+        """Same as `follow_path`, but path and letters are yielded in pieces.
+
+        Each piece is a part of the path taken and letters collected on it.
+        First piece is yielded before walking, then a piece is yielded
+        after every `batch_size` moves, so memory doesn't grow
+        with the length of the path. Limits are the same as in `follow_path`.
+
+        If it is impossible to reach the end, `PathError` is raised
+        after all pieces leading to the problem.
         """
-        self._initialize(road_map)
+        limits = (max_steps, deadline, cancel, max_path_length)
+        self._initialize(road_map, compact=False)
+        yield START, ""
+        self._clear_path()
         while True:
-            char = self._map.move(self._direction)
-            self._path.append(char)
-            if char == END:
-                path = "".join(self._path)
-                return self._letters.get(), path
-
-            if char.isalpha():
-                self._letters.collect(self._map.position, char)
-            self._analyze_next_move()
-
-    def _initialize(self, road_map: RoadMap):
-        assert road_map[road_map.position] == START
-        self._path = [START]
+            pause_at = self._moves + batch_size
+            try:
+                if limits == (None,) * 4:
+                    self._pause_at = pause_at
+                    result = self._walk()
+                else:
+                    result = self._walk_limited(*limits, pause_at)
+            except PathError:
+                yield "".join(self._path), self._letters.get()
+                raise
+            yield "".join(self._path), self._letters.get()
+            if result is not None:
+                return
+            self._clear_path()
+            self._letters.truncate(0)
+
+    def _walk(self) -> tuple[str, str | RunLengthPath] | None:
+        # Continues from the current state, so a walk can also be resumed.
+        # Pauses and returns None after `_pause_at` moves, counted in `_moves`.
+        moves = self._moves
+        try:
+            while True:
+                moves += 1
+                char = self._map.move(self._direction)
+                self._path.append(char)
+                if char == END:
+                    path = self._path.build() if self._compact else "".join(self._path)
+                    return self._letters.get(), path
+
+                if char.isalpha():
+                    if self._map.first_visit:
+                        self._letters.append(char)
+                elif char in (HORIZONTAL, VERTICAL):
+                    self._follow_corridor(char)
+                self._analyze_next_move()
+                if moves >= self._pause_at:
+                    return None
+        finally:
+            self._moves = moves
+
+    def _walk_limited(
+        self,
+        max_steps: int | None,
+        deadline: float | None,
+        cancel: CancellationToken | None,
+        max_path_length: int | None,
+        pause_at: float = math.inf,
+    ) -> tuple[str, str | RunLengthPath] | None:
+        # Walks in pauses, limits are checked between them and after the end.
+        # A pause can end exactly at `max_steps`. Like `_walk`, returns None
+        # after `pause_at` moves.
+        self._limited = True
+        self._max_path_length = max_path_length
+        limits = (max_steps, deadline, cancel, max_path_length)
+        while True:
+            self._check_limits(*limits)
+            moves = _LIMIT_CHECK_INTERVAL
+            if max_steps is not None:
+                if self._moves >= max_steps:
+                    self._raise_limit(StepLimitExceeded, "Step budget was exceeded")
+                moves = min(moves, max_steps - self._moves)
+            self._pause_at = min(self._moves + moves, pause_at)
+            try:
+                result = self._walk()
+            except _RunTooLong as e:
+                # only now `_moves` counts all moves of the walk
+                self._raise_limit(PathLengthExceeded, "Path is too long", e.pending)
+            if result is not None:
+                self._check_limits(*limits)
+                return result
+            if self._moves >= pause_at:
+                return None
+
+    def _check_limits(
+        self,
+        max_steps: int | None,
+        deadline: float | None,
+        cancel: CancellationToken | None,
+        max_path_length: int | None,
+    ):
+        if cancel is not None and cancel.cancelled:
+            self._raise_limit(TraversalCancelled, "Traversal was cancelled")
+        if deadline is not None and time.monotonic() >= deadline:
+            self._raise_limit(DeadlineExceeded, "Deadline was exceeded")
+        if max_path_length is not None and self._path_length() > max_path_length:
+            self._raise_limit(PathLengthExceeded, "Path is too long")
+        if max_steps is not None and self._moves > max_steps:
+            self._raise_limit(StepLimitExceeded, "Step budget was exceeded")
+
+    def _path_length(self) -> int:
+        if self._compact:
+            return self._path.length
+        # only parts added since the last time are measured
+        self._path_chars += sum(map(len, self._path[self._measured_parts :]))
+        self._measured_parts = len(self._path)
+        return self._path_chars
+
+    def _clear_path(self):
+        # the length of a path yielded in pieces includes all pieces
+        self._path_length()
+        self._path.clear()
+        self._measured_parts = 0
+
+    def _measure_run(self, count: int):
+        # Runs are added at once, many of them could make the path much longer
+        # than `max_path_length` before the next pause, so once they add up
+        # to many characters, the path is measured before the run is added.
+        self._unmeasured += count
+        if self._unmeasured < _LIMIT_CHECK_INTERVAL or self._max_path_length is None:
+            return
+        self._unmeasured = 0
+        if self._path_length() + count > self._max_path_length:
+            raise _RunTooLong(count)
+
+    def _raise_limit(self, error_type: type, reason: str, pending: int = 0):
+        # `pending` characters are walked, but not added to the path yet
+        path_length = self._path_length() + pending
+        raise error_type(reason, self._moves, path_length, self._map.position)
+
+    def _initialize(
+        self,
+        road_map: RoadMap,
+        direction: Direction | None = None,
+        compact: bool | None = None,
+    ):
+        start_char = road_map.char_at(road_map.cell)
+        # paths yielded in pieces are never compact
+        self._compact = self.compact if compact is None else compact
+        self._path = _RunLengthBuilder(start_char) if self._compact else [start_char]
+        self._pause_at = math.inf
+        self._moves = 0
+        self._limited = False
+        self._max_path_length = None
+        self._unmeasured = 0
+        self._path_chars = 0
+        self._measured_parts = 0
         self._possible_inifinite_loops = set()
         self._map = road_map
         self._letters = LetterCollector()
+        self._reset_cycle_detection()
+
+        if direction is not None:
+            assert start_char and start_char != END
+            if start_char.isalpha():
+                road_map.jump_to_cell(road_map.cell)
+                self._letters.append(start_char)
+            next_char = road_map.char_at(road_map.next_cell(direction))
+            if not next_char or not self._char_supports_direction(next_char, direction):
+                raise PathError("Start is not connected to anything")
+            self._direction = direction
+            return
 
+        assert start_char == START
         initial_direction = None
-        for direction, position in self._map.iter_surroundings():
-            char = self._map[position]
+        for direction, cell in self._map.iter_surrounding_cells():
+            char = self._map.char_at(cell)
             if not self._char_supports_direction(char, direction):
                 continue
             if initial_direction is not None:
@@ -68,11 +312,23 @@ class PathFinder:
             return direction in (Direction.UP, Direction.DOWN)
         return True
 
+    def _follow_corridor(self, char: str):
+        # Nothing can change until the end of a straight line of the same character,
+        # so skip to its end at once.
+        if self._char_supports_direction(char, self._direction):
+            skipped = self._map.skip_run(self._direction)
+            if skipped and self._limited:
+                self._measure_run(skipped)
+            if skipped and self._compact:
+                self._path.append_run(char, skipped)
+            elif skipped:
+                self._path.append(char * skipped)
+
     def _analyze_next_move(self):
-        current_char = self._map[self._map.position]
+        current_char = self._map.char_at(self._map.cell)
         # next if going in the same direction
-        next_position = self._direction.next_position(self._map.position)
-        next_char = self._map[next_position]
+        next_cell = self._map.next_cell(self._direction)
+        next_char = self._map.char_at(next_cell)
 
         if current_char in (HORIZONTAL, VERTICAL):
             if not next_char:
@@ -88,7 +344,7 @@ class PathFinder:
             return
 
         if current_char == TURN:
-            surroundings = list(self._map.iter_surroundings())
+            surroundings = list(self._map.iter_surrounding_cells())
             if (
                 len(surroundings) == 2
                 and surroundings[0][0].opposite == surroundings[1][0]
@@ -99,41 +355,41 @@ class PathFinder:
         if (
             not next_char
             or not self._char_supports_direction(next_char, self._direction)
-            or self._map.is_visited(next_position)
+            or self._map.is_cell_visited(next_cell)
         ):
             self._handle_turn()
 
     def _use_tunnel(self, direction: Direction) -> bool:
-        position = self._map.position
-        tunnel_path = []
-        while True:
-            position = direction.next_position(position)
-            char = self._map[position]
-            if not char:
-                return False
-            if self._map.is_visited(position):
-                tunnel_path.append(char)
-                continue
-            if not self._char_supports_direction(char, direction):
-                return False
-            self._path.extend(tunnel_path)
-            # Stay in the tunnel so other logic can handle what is after the tunnel.
-            # for example to collect a letter:
-            #   ++
-            # @--+
-            #   A--x
-            last_pos_in_tunnel = direction.opposite.next_position(position)
-            self._map.jump_to(last_pos_in_tunnel)
-            return True
+        # Visited cells are always usable, so the tunnel ends at the first unvisited one.
+        cell = self._map.next_unvisited_cell(self._map.cell, direction)
+        char = self._map.char_at(cell)
+        if not char or not self._char_supports_direction(char, direction):
+            return False
+        tunnel_path = self._map.chars_between(cell, direction)
+        if tunnel_path:
+            if self._limited:
+                self._measure_run(len(tunnel_path))
+            self._path.append(tunnel_path)
+            if self._limited and len(tunnel_path) >= _LIMIT_CHECK_INTERVAL:
+                # pause after a long tunnel, to check other limits right after it
+                self._pause_at = 0
+        # Stay in the tunnel so other logic can handle what is after the tunnel.
+        # for example to collect a letter:
+        #   ++
+        # @--+
+        #   A--x
+        last_cell_in_tunnel = self._map.next_cell(direction.opposite, cell)
+        self._map.jump_to_cell(last_cell_in_tunnel)
+        return True
 
     def _set_next_direction(self, revisit=False) -> bool:
         possible_tunnels = []
-        for direction, position in self._map.iter_surroundings():
-            if not self._char_supports_direction(self._map[position], direction):
+        for direction, cell in self._map.iter_surrounding_cells():
+            if not self._char_supports_direction(self._map.char_at(cell), direction):
                 possible_tunnels.append(direction)
                 continue
             if (
-                not self._map.is_visited(position)
+                not self._map.is_cell_visited(cell)
                 or revisit
                 and direction is not self._direction.opposite
             ):
@@ -145,19 +401,71 @@ class PathFinder:
                 return True
         return False
 
+    def _reset_cycle_detection(self):
+        # States are (cell, direction) pairs seen at turns since the last time
+        # a new cell was visited. Set of all states is created when it is
+        # needed for the first time, and then reused with the same road map.
+        if getattr(self, "_states_of", None) is self._map.visited:
+            self._forget_states()
+        else:
+            self._states = None
+            self._states_of = self._map.visited
+        self._marked_states = []
+        self._visited_at_turn = -1
+        self._loop_start = None
+        self._cycle_found = False
+
+    def _forget_states(self):
+        for state in self._marked_states:
+            self._states.discard(state)
+        self._marked_states.clear()
+
+    def _check_for_cycle(self):
+        # Nothing new was visited since the state was seen, so everything
+        # repeats from here on. Loop is reported where a turn went back
+        # to a visited cell for the second time, since the last new visit.
+        # If that didn't happen yet, it happens within the next lap.
+        if self._map.new_visits != self._visited_at_turn:
+            self._visited_at_turn = self._map.new_visits
+            self._loop_start = None
+            self._forget_states()
+        if self._states is None:
+            self._states = self._map.visited.scaled(4)
+        state = 4 * self._map.cell + self._direction.value - 1
+        if not self._states.add(state):
+            self._marked_states.append(state)
+        elif self._loop_start is not None:
+            self._raise_loop(self._loop_start)
+        elif self._cycle_found:
+            # a whole lap without going back to a visited cell
+            self._raise_loop(self._map.cell)
+        else:
+            self._cycle_found = True
+
+    def _raise_loop(self, cell: int):
+        position = self._map.position_of(cell)
+        raise PathError(
+            f"There is an infinite loop when following the path. Loop started at {position}"
+        )
+
     def _handle_turn(self):
         if self._set_next_direction():
             return
+        # Only turns without anything new to visit can be a part of a loop.
+        self._check_for_cycle()
         # priorizite going straight if all turns are already visited
-        char_straight = self._map[self._direction.next_position(self._map.position)]
+        char_straight = self._map.char_at(self._map.next_cell(self._direction))
         if char_straight and self._char_supports_direction(
             char_straight, self._direction
         ):
             return
         if not self._set_next_direction(revisit=True):
             raise PathError(f"There is nowhere to turn at {self._map.position}")
-        if self._map.position in self._possible_inifinite_loops:
-            raise PathError(
-                f"There is an infinite loop when following the path. Loop started at {self._map.position}"
-            )
-        self._possible_inifinite_loops.add(self._map.position)
+        # Going back to the same cell twice is not a loop, unless the walk
+        # repeats itself, which is decided by `_check_for_cycle`.
+        if self._map.cell in self._possible_inifinite_loops:
+            if self._cycle_found:
+                self._raise_loop(self._map.cell)
+            if self._loop_start is None:
+                self._loop_start = self._map.cell
+        self._possible_inifinite_loops.add(self._map.cell)
@@ -0,0 +1,115 @@
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from saona.grid import _ASCII_SYMBOLS, FlatGrid
+from saona.preprocessor import _find_end, process
+
+__all__ = ("load_compiled", "save_compiled")
+
+_MAGIC = b"SAONAMAP"
+_VERSION = 1
+# magic, version, bytes per cell, rows, columns, start and end positions,
+# size of non-ASCII symbols, offset of cells, checksum of cells, checksum of header
+_HEADER = struct.Struct("<8sHBxQQQQQQQQII")
+# cells start at a page boundary, so they can be mapped on their own
+_PAGE = 4096
+
+
+def save_compiled(grid_str: str, path: str | os.PathLike):
+    """Validate a map and save it in a binary format which loads without parsing.
+
+    File holds a header, non-ASCII symbols and cells of a `FlatGrid`
+    with its border, starting at a page boundary. Raises `PathError`
+    if the map is invalid, same as `saona.traverse`.
+    """
+    grid, start = process(grid_str, backend="flat")
+    end = _find_end(grid_str)
+    symbols = "".join(grid.symbols[len(_ASCII_SYMBOLS) :]).encode("utf-8")
+    cells = grid.cells
+    itemsize = 1
+    if isinstance(cells, array):
+        itemsize = 2
+        if sys.byteorder == "big":
+            cells = array("H", cells)
+            cells.byteswap()
+    cells_offset = -(-(_HEADER.size + len(symbols)) // _PAGE) * _PAGE
+    fields = [
+        _MAGIC,
+        _VERSION,
+        itemsize,
+        grid.rows,
+        grid.columns,
+        *start,
+        *end,
+        len(symbols),
+        cells_offset,
+        zlib.crc32(cells),
+    ]
+    header = _HEADER.pack(*fields, _header_checksum(fields, symbols))
+    with open(path, "wb") as file:
+        file.write(header)
+        file.write(symbols)
+        file.write(bytes(cells_offset - _HEADER.size - len(symbols)))
+        file.write(cells)
+
+
+def load_compiled(
+    path: str | os.PathLike, verify: bool = True
+) -> tuple[FlatGrid, tuple[int, int]]:
+    """Load a map saved by `save_compiled`, same result as `process` with "flat" backend.
+
+    Cells are memory-mapped, so they are read from the file only when
+    they are used. With `verify`, checksum of all cells is checked first,
+    which reads the whole file, otherwise only the header is checked.
+    Raises `ValueError` if the file is not a valid saved map.
+    """
+    with open(path, "rb") as file:
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size or not header.startswith(_MAGIC):
+            raise ValueError("File is not a compiled map")
+        *fields, header_checksum = _HEADER.unpack(header)
+        if fields[1] != _VERSION:
+            raise ValueError(f"Unsupported version of a compiled map: {fields[1]}")
+        (
+            _,
+            _,
+            itemsize,
+            rows,
+            columns,
+            start_row,
+            start_col,
+            _,
+            _,
+            symbols_size,
+            cells_offset,
+            cells_checksum,
+        ) = fields
+        symbols = file.read(symbols_size)
+        if _header_checksum(fields, symbols) != header_checksum:
+            raise ValueError("Header of the compiled map is corrupted")
+        size = (rows + 2) * (columns + 2) * itemsize
+        if os.fstat(file.fileno()).st_size != cells_offset + size:
+            raise ValueError("Compiled map is truncated")
+        if itemsize == 1 and cells_offset % mmap.ALLOCATIONGRANULARITY == 0:
+            cells = mmap.mmap(
+                file.fileno(), size, access=mmap.ACCESS_READ, offset=cells_offset
+            )
+        else:
+            file.seek(cells_offset)
+            cells = file.read(size)
+    if verify and zlib.crc32(cells) != cells_checksum:
+        raise ValueError("Cells of the compiled map are corrupted")
+    if itemsize == 2:
+        cells = array("H", cells)
+        if sys.byteorder == "big":
+            cells.byteswap()
+    grid_symbols = list(_ASCII_SYMBOLS) + list(symbols.decode("utf-8"))
+    return FlatGrid(cells, grid_symbols, rows, columns), (start_row, start_col)
+
+
+def _header_checksum(fields: list, symbols: bytes) -> int:
+    return zlib.crc32(symbols, zlib.crc32(_HEADER.pack(*fields, 0)))
@@ -0,0 +1,115 @@
+from typing import Iterable
+
+from saona.grid import FlatGrid
+from saona.path_finder import PathFinder
+from saona.preprocessor import _check_row
+from saona.road_map import Direction, RoadMap
+from saona.util import END, PathError
+
+__all__ = ("PreparedMap",)
+
+
+class PreparedMap:
+    """Map which is validated and indexed once, to follow paths from many starts.
+
+    Characters are validated the same as by `saona.traverse`, but the map
+    doesn't need exactly one `@` and `x`, paths end at any `x`.
+    Raises `PathError` if there is an unsupported character.
+
+    All queries share one `RoadMap` and `PathFinder`. Runs of identical
+    characters found by earlier queries are reused, and before each query
+    only cells visited by the previous one are forgotten, so a query costs
+    as much as the path it follows, not as much as the whole map.
+    """
+
+    def __init__(self, grid_str: str):
+        rows = grid_str.split("\n")
+        for row in rows:
+            _check_row(row)
+        self._grid = FlatGrid.from_rows(rows, blank=" ")
+        self._map = _QueryRoadMap(self._grid, (0, 0))
+        self._path_finder = PathFinder()
+
+    def follow_from(
+        self, position: tuple[int, int], direction: Direction
+    ) -> tuple[str, str]:
+        """Follow the path from the position, going in the direction first.
+
+        Returns collected letters and path taken, which starts with the character
+        at the position. Rules are the same as in `PathFinder.follow_path`,
+        `PathError` is raised if it is impossible to reach an end,
+        also if there is no path at the position.
+        """
+        cell = self._grid.cell_id(position)
+        char = self._grid[cell]
+        if not char:
+            raise PathError(f"There is no path at {position}")
+        if char == END:
+            return "", END
+        self._map.restart(cell)
+        return self._path_finder.follow_path(self._map, direction)
+
+    def follow_many(
+        self, starts: Iterable[tuple[tuple[int, int], Direction]]
+    ) -> list[tuple[str, str] | PathError]:
+        """Same as `follow_from` for every position and direction, in order.
+
+        Each result is either collected letters and path taken,
+        or `PathError` if it was impossible to follow the path.
+        """
+        results = []
+        for position, direction in starts:
+            try:
+                results.append(self.follow_from(position, direction))
+            except PathError as e:
+                results.append(e)
+        return results
+
+
+class _QueryRoadMap(RoadMap):
+    """`RoadMap` which remembers what became visited, to forget only that.
+
+    Before the first query, no cell is visited, so after a query every set
+    bit of `visited` belongs to a cell visited by the query. Whole bytes
+    around those cells can be zeroed, which leaves the set empty again.
+    """
+
+    def __init__(self, grid: FlatGrid, initial_position: tuple[int, int]):
+        super().__init__(grid, initial_position)
+        self._visited_cells = []
+        self._visited_runs = []
+
+    def restart(self, cell: int):
+        """Forget visits of the previous query and go to the cell."""
+        bits = self._visited_bits
+        for visited in self._visited_cells:
+            bits[visited >> 3] = 0
+        for first, last, step in self._visited_runs:
+            if step == 1:
+                first_byte, last_byte = first >> 3, last >> 3
+                bits[first_byte : last_byte + 1] = bytes(last_byte - first_byte + 1)
+            else:
+                for visited in range(first, last + 1, step):
+                    bits[visited >> 3] = 0
+        self._visited_cells.clear()
+        self._visited_runs.clear()
+        for jumps in self._jumps.values():
+            jumps.clear()
+        self.cell = cell
+        self.first_visit = False
+        self.new_visits = 0
+
+    def _enter(self, cell: int) -> str:
+        char = super()._enter(cell)
+        if self.first_visit:
+            self._visited_cells.append(cell)
+        return char
+
+    def skip_run(self, direction: Direction) -> int:
+        start = self.cell
+        count = super().skip_run(direction)
+        if count:
+            offset = self._offsets[direction]
+            first, last = sorted((start + offset, self.cell))
+            self._visited_runs.append((first, last, abs(offset)))
+        return count
@@ -1,11 +1,39 @@
+import atexit
+import concurrent.futures
+import gzip
+import mmap
+import os
+import re
+import tempfile
+import threading
+from array import array
+from multiprocessing import shared_memory
+from typing import Callable, Iterable
+
+from saona.grid import _ASCII_SYMBOLS, FlatGrid, SparseGrid
+from saona.tiled import TiledGrid
 from saona.util import END, HORIZONTAL, START, TURN, VERTICAL, PathError
 
-__all__ = ("process",)
+__all__ = ("process", "process_buffer", "process_file")
 
 _VALID_SIGNS = (START, END, TURN, HORIZONTAL, VERTICAL, " ")
+_VALID_ASCII = "".join(_VALID_SIGNS) + "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_VALID_ASCII_BYTES = _VALID_ASCII.encode("ascii")
+_REMOVE_VALID_ASCII = str.maketrans("", "", _VALID_ASCII)
+_NEWLINE = re.compile(b"\n")
+_GZIP_MAGIC = b"\x1f\x8b"
+# smaller inputs are not worth sending to worker processes
+_MIN_BAND_SIZE = 1 << 20
+# files in memory, where the system has them
+_SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+# pools of `_process_parallel` by the number of workers, see `_band_pool`
+_pools = {}
+_pools_lock = threading.Lock()
 
 
-def process(grid_str: str) -> tuple[list[list[str]], tuple[int, int]]:
+def process(
+    grid_str: str, backend: str = "lists", validate: str = "strict", workers: int = 1
+) -> tuple[list[list[str]] | FlatGrid | SparseGrid, tuple[int, int]]:
     """Process user input and get usable grid and starting position.
 
     Performs validations:
@@ -15,7 +43,45 @@ def process(grid_str: str) -> tuple[list[list[str]], tuple[int, int]]:
     Performs transformations:
         - splits string into 2D array of characters
         - sets unused cells to empty string
+
+    Backend decides the type of the returned grid:
+        - "lists" returns a list of lists of characters
+        - "flat" returns a `FlatGrid`, which is much more compact for large maps
+        - "numpy" returns a `FlatGrid` too, but uses whole-array operations
+          of optional dependency `numpy` to process it, which pays off for
+          very large maps
+        - "sparse" returns a `SparseGrid`, which stores only usable cells,
+          for huge maps which are mostly empty
+
+    With `validate="lazy"`, only starts and ends are found up front, rows
+    are written into the grid and checked when one of their cells is read.
+    An unsupported character raises `PathError` only if the path reaches it.
+    Use it for trusted maps, with backends "flat" and "sparse".
+
+    With `workers` above 1, backend "flat" splits large ASCII maps into bands
+    of rows, which are validated and written into a shared grid buffer
+    by that many processes. Results and errors are the same as without workers.
     """
+    if workers > 1:
+        if backend != "flat" or validate != "strict":
+            raise ValueError("Only strict validation with flat backend uses workers")
+        return _process_parallel(grid_str, workers)
+    if validate == "lazy":
+        if backend == "flat":
+            return _process_flat_lazy(grid_str)
+        if backend == "sparse":
+            return _process_sparse_lazy(grid_str)
+        raise ValueError(f"Backend {backend} doesn't support lazy validation")
+    if validate != "strict":
+        raise ValueError(f"Unknown validation: {validate}")
+    if backend == "flat":
+        return _process_flat(grid_str)
+    if backend == "numpy":
+        return _process_numpy(grid_str)
+    if backend == "sparse":
+        return _process_sparse(grid_str)
+    if backend != "lists":
+        raise ValueError(f"Unknown backend: {backend}")
     grid = [list(row) for row in grid_str.split("\n")]
     _adjust_grid(grid)
     start_idx = _find_start(grid)
@@ -54,3 +120,465 @@ def _find_start(grid: list[list[str]]) -> tuple[int, int]:
     if not has_end:
         raise PathError("Map is missing an end")
     return start
+
+
+def _process_flat(grid_str: str) -> tuple[FlatGrid, tuple[int, int]]:
+    # Same validations as for lists, but without looping over every character.
+    rows = grid_str.split("\n")
+    for row in rows:
+        _check_row(row)
+    start_idx = _find_start_in_str(grid_str)
+    return FlatGrid.from_rows(rows, blank=" "), start_idx
+
+
+def _process_parallel(grid_str: str, workers: int) -> tuple[FlatGrid, tuple[int, int]]:
+    if not grid_str.isascii() or len(grid_str) < 2 * _MIN_BAND_SIZE:
+        # codes of non-ASCII symbols have to be assigned in one place
+        return _process_flat(grid_str)
+    # Bands start after a newline, as if there was one more after the end.
+    # For ASCII, offsets in the string are offsets in its encoded bytes.
+    band_starts = [0]
+    band_size = max(_MIN_BAND_SIZE, len(grid_str) // workers + 1)
+    while (newline := grid_str.find("\n", band_starts[-1] + band_size)) != -1:
+        band_starts.append(newline + 1)
+    band_starts.append(len(grid_str) + 1)
+    bands = list(zip(band_starts, band_starts[1:]))
+
+    # encoded one band at a time, so the whole map is never copied at once
+    source = shared_memory.SharedMemory(create=True, size=len(grid_str))
+    try:
+        for start, stop in bands:
+            source.buf[start : stop - 1] = grid_str[start : stop - 1].encode("ascii")
+        pool = _band_pool(workers)
+        scans = list(pool.map(_scan_band, [(source.name, *band) for band in bands]))
+        first_rows = [0]
+        found = {START: [], END: []}
+        for row_count, _, invalid, band_found in scans:
+            # the first invalid character in reading order wins, as in one process
+            if invalid is not None:
+                raise PathError(f"There is an invalid character: {invalid}")
+            for sign, positions in found.items():
+                positions.extend(
+                    (first_rows[-1] + row_idx, col_idx)
+                    for row_idx, col_idx in band_found[sign]
+                )
+            first_rows.append(first_rows[-1] + row_count)
+        start_idx = _pick_start(found[START][:2], found[END][:2])
+
+        columns = max(scan[1] for scan in scans)
+        stride = columns + 2
+        size = (first_rows[-1] + 2) * stride
+        # Workers write into a file which becomes cells of the grid, memory-mapped
+        # the same as by `load_compiled`. It is removed once it is mapped.
+        fd, path = tempfile.mkstemp(prefix="saona-", dir=_SHARED_DIR)
+        try:
+            # new file is filled with zeros, which are unusable cells
+            os.ftruncate(fd, size)
+            args = [
+                (source.name, path, stride, first_row, *band)
+                for first_row, band in zip(first_rows, bands)
+            ]
+            list(pool.map(_fill_band, args))
+            cells = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+            os.unlink(path)
+        return FlatGrid(cells, list(_ASCII_SYMBOLS), first_rows[-1], columns), start_idx
+    finally:
+        source.close()
+        source.unlink()
+
+
+def _band_pool(workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    # Pools are kept for later maps, starting workers costs more than a band.
+    # Every number of workers has its own pool, so another thread can keep
+    # using a pool while a different number of workers is asked for.
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = concurrent.futures.ProcessPoolExecutor(workers)
+        return pool
+
+
+@atexit.register
+def _shutdown_band_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+def _read_band(name: str, start: int, stop: int) -> bytes:
+    memory = shared_memory.SharedMemory(name=name, track=False)
+    try:
+        return bytes(memory.buf[start : stop - 1])
+    finally:
+        memory.close()
+
+
+def _scan_band(
+    args: tuple[str, int, int],
+) -> tuple[int, int, str | None, dict[str, list[tuple[int, int]]]]:
+    # Runs in a worker, returns the number of rows and columns of the band,
+    # its first invalid character and up to two starts and ends in it.
+    band = _read_band(*args)
+    invalid = band.translate(None, _VALID_ASCII_BYTES + b"\n")
+    columns = max(map(len, band.split(b"\n")))
+    found = {}
+    for sign in (START, END):
+        found[sign] = positions = []
+        idx = band.find(sign.encode("ascii"))
+        while idx != -1 and len(positions) < 2:
+            positions.append(
+                (band.count(b"\n", 0, idx), idx - band.rfind(b"\n", 0, idx) - 1)
+            )
+            idx = band.find(sign.encode("ascii"), idx + 1)
+    invalid_char = chr(invalid[0]) if invalid else None
+    return band.count(b"\n") + 1, columns, invalid_char, found
+
+
+def _fill_band(args: tuple[str, str, int, int, int, int]):
+    # Runs in a worker, writes rows of the band to their place in the grid.
+    source_name, path, stride, first_row, start, stop = args
+    band = _read_band(source_name, start, stop).replace(b" ", b"\0")
+    with open(path, "r+b") as file:
+        with mmap.mmap(file.fileno(), 0) as target:
+            cell = (first_row + 1) * stride + 1
+            for row in band.split(b"\n"):
+                target[cell : cell + len(row)] = row
+                cell += stride
+
+
+def _process_flat_lazy(grid_str: str) -> tuple[FlatGrid, tuple[int, int]]:
+    start_idx = _find_start_in_str(grid_str)
+    rows = grid_str.split("\n")
+    return _LazyFlatGrid(rows, max(map(len, rows))), start_idx
+
+
+def _process_sparse_lazy(grid_str: str) -> tuple[SparseGrid, tuple[int, int]]:
+    start_idx = _find_start_in_str(grid_str)
+    rows = grid_str.split("\n")
+    return _LazySparseGrid(rows, max(map(len, rows))), start_idx
+
+
+def _invalid_symbols(symbols: list[str]) -> set[str]:
+    return {
+        symbol
+        for symbol in symbols
+        if symbol and symbol not in _VALID_ASCII and not _is_letter(symbol)
+    }
+
+
+class _LazyRows:
+    """Rows of a grid which are written when a cell of them is read for the first time.
+
+    Reading an unsupported character raises `PathError`, characters
+    which are never read are never checked.
+    """
+
+    def _init_rows(self, rows: list[str]):
+        self._rows = rows
+        # rows of the border have nothing to write
+        self._unfilled = bytearray(len(rows) + 2)
+        self._unfilled[1:-1] = b"\1" * len(rows)
+        self.invalid = _invalid_symbols(self.symbols)
+
+    def _fill_row_of(self, cell: int):
+        row_idx = self._row_of(cell)
+        if self._unfilled[row_idx]:
+            self._unfilled[row_idx] = 0
+            self.fill_row(row_idx - 1, self._rows[row_idx - 1], blank=" ")
+
+    def code(self, symbol: str) -> int:
+        if symbol not in self._codes and not _is_letter(symbol):
+            self.invalid.add(symbol)
+        return super().code(symbol)
+
+    def run_end(self, cell: int, offset: int) -> int:
+        char = self[cell]
+        if offset in (1, -1):
+            return super().run_end(cell, offset)
+        while True:
+            self._fill_row_of(cell + offset)
+            if super().__getitem__(cell + offset) != char:
+                return cell
+            cell += offset
+
+    def text(self, start: int, stop: int, step: int) -> str:
+        for cell in range(start, stop, step):
+            self._fill_row_of(cell)
+        return super().text(start, stop, step)
+
+    def __getitem__(self, cell: int) -> str:
+        self._fill_row_of(cell)
+        char = super().__getitem__(cell)
+        if char in self.invalid:
+            raise PathError(f"There is an invalid character: {char}")
+        return char
+
+
+class _LazyFlatGrid(_LazyRows, FlatGrid):
+    """`FlatGrid` which writes and validates rows only when they are read."""
+
+    def __init__(self, rows: list[str], columns: int):
+        cells = bytearray((len(rows) + 2) * (columns + 2))
+        super().__init__(cells, list(_ASCII_SYMBOLS), len(rows), columns)
+        self._init_rows(rows)
+
+    def _row_of(self, cell: int) -> int:
+        return cell // self.stride
+
+    def __getitem__(self, cell: int) -> str:
+        # same as `_LazyRows.__getitem__`, inlined as it is read the most
+        if self._unfilled[cell // self.stride]:
+            self._fill_row_of(cell)
+        char = self.symbols[self.cells[cell]]
+        if char in self.invalid:
+            raise PathError(f"There is an invalid character: {char}")
+        return char
+
+
+class _LazySparseGrid(_LazyRows, SparseGrid):
+    """`SparseGrid` which writes and validates rows only when they are read."""
+
+    def __init__(self, rows: list[str], columns: int):
+        super().__init__(len(rows), columns)
+        self._init_rows(rows)
+
+    def _row_of(self, cell: int) -> int:
+        return cell >> self._column_bits
+
+
+def _check_row(row: str):
+    if row.isascii():
+        invalid = row.encode("ascii").translate(None, _VALID_ASCII_BYTES)
+        if invalid:
+            raise PathError(f"There is an invalid character: {chr(invalid[0])}")
+        return
+    for char in row.translate(_REMOVE_VALID_ASCII):
+        if not _is_letter(char):
+            raise PathError(f"There is an invalid character: {char}")
+
+
+def _find_start_in_str(grid_str: str) -> tuple[int, int]:
+    found = {START: [], END: []}
+    for sign, positions in found.items():
+        idx = grid_str.find(sign)
+        while idx != -1 and len(positions) < 2:
+            row_idx = grid_str.count("\n", 0, idx)
+            positions.append((row_idx, idx - grid_str.rfind("\n", 0, idx) - 1))
+            idx = grid_str.find(sign, idx + 1)
+    return _pick_start(found[START], found[END])
+
+
+def _find_end(grid_str: str) -> tuple[int, int]:
+    # for validated maps, which have exactly one end
+    idx = grid_str.find(END)
+    return grid_str.count("\n", 0, idx), idx - grid_str.rfind("\n", 0, idx) - 1
+
+
+def _process_sparse(grid_str: str) -> tuple[SparseGrid, tuple[int, int]]:
+    # Rows are sliced one at a time, so besides the grid only one row is in memory.
+    row_count = 0
+    columns = 0
+    for row in _iter_rows(grid_str):
+        _check_row(row)
+        row_count += 1
+        columns = max(columns, len(row))
+    start_idx = _find_start_in_str(grid_str)
+    grid = SparseGrid(row_count, columns)
+    for row_idx, row in enumerate(_iter_rows(grid_str)):
+        grid.fill_row(row_idx, row, blank=" ")
+    return grid, start_idx
+
+
+def _iter_rows(grid_str: str) -> Iterable[str]:
+    row_start = 0
+    while (row_end := grid_str.find("\n", row_start)) != -1:
+        yield grid_str[row_start:row_end]
+        row_start = row_end + 1
+    yield grid_str[row_start:]
+
+
+def _process_numpy(grid_str: str) -> tuple[FlatGrid, tuple[int, int]]:
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError('Backend "numpy" requires numpy to be installed') from e
+
+    if not grid_str.isascii():
+        # non-ASCII letters don't fit into uint8 codes of characters
+        return _process_flat(grid_str)
+
+    data = np.frombuffer(grid_str.encode("ascii"), dtype=np.uint8)
+    newlines = np.flatnonzero(data == ord("\n"))
+    row_starts = np.concatenate(([0], newlines + 1))
+    row_ends = np.append(newlines, len(data))
+
+    valid = np.zeros(256, dtype=bool)
+    valid[np.frombuffer(_VALID_ASCII_BYTES + b"\n", dtype=np.uint8)] = True
+    is_valid = valid[data]
+    if not is_valid.all():
+        first_invalid = data[np.argmin(is_valid)]
+        raise PathError(f"There is an invalid character: {chr(first_invalid)}")
+
+    found = {}
+    for sign in (START, END):
+        indices = np.flatnonzero(data == ord(sign))[:2]
+        row_indices = np.searchsorted(newlines, indices)
+        found[sign] = list(
+            zip(row_indices.tolist(), (indices - row_starts[row_indices]).tolist())
+        )
+    start_idx = _pick_start(found[START], found[END])
+
+    columns = int((row_ends - row_starts).max())
+    grid = FlatGrid.empty(len(row_starts), columns)
+    padded = np.frombuffer(grid.cells, dtype=np.uint8).reshape(-1, grid.stride)
+    for row_idx, (row_start, row_end) in enumerate(
+        zip(row_starts.tolist(), row_ends.tolist())
+    ):
+        padded[row_idx + 1, 1 : 1 + row_end - row_start] = data[row_start:row_end]
+    # spaces become unusable cells
+    padded *= padded != ord(" ")
+    return grid, start_idx
+
+
+def process_buffer(buffer: bytes | memoryview) -> tuple[FlatGrid, tuple[int, int]]:
+    """Same as `process` with "flat" backend, but for UTF-8 encoded bytes.
+
+    Buffer is never decoded as a whole, rows are read directly
+    from the buffer using an index of row offsets.
+    """
+    with memoryview(buffer) as view:
+        row_bounds = []
+        row_start = 0
+        for newline in _NEWLINE.finditer(view):
+            row_bounds.append((row_start, newline.start()))
+            row_start = newline.end()
+        row_bounds.append((row_start, len(view)))
+        return _process_byte_rows(
+            lambda: (bytes(view[start:end]) for start, end in row_bounds)
+        )
+
+
+def process_file(
+    path: str | os.PathLike,
+    backend: str = "flat",
+    memory_budget: int = 64 * 1024 * 1024,
+) -> tuple[FlatGrid | TiledGrid, tuple[int, int]]:
+    """Same as `process_buffer`, but for a file.
+
+    File is memory-mapped instead of being read into memory.
+    Gzip compressed files are decompressed incrementally, one row at a time.
+
+    Backend "tiled" returns a `TiledGrid` instead, which reads tiles
+    of the map from the file only when they are needed, keeping at most
+    `memory_budget` bytes of them in memory. Only offsets of rows are kept
+    besides them. Grid has to be closed after use. Compressed files can't
+    be read in tiles.
+    """
+    if backend == "tiled":
+        return _process_tiled(path, memory_budget)
+    if backend != "flat":
+        raise ValueError(f"Unknown backend: {backend}")
+    with open(path, "rb") as file:
+        if file.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC:
+            return _process_byte_rows(lambda: _iter_gzip_rows(path))
+        if not os.fstat(file.fileno()).st_size:
+            return process_buffer(b"")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return process_buffer(mapped)
+
+
+def _iter_gzip_rows(path: str | os.PathLike) -> Iterable[bytes]:
+    with gzip.open(path, "rb") as file:
+        line = b""
+        for line in file:
+            yield line.removesuffix(b"\n")
+        # same as splitting a string, there is an empty row after the last newline
+        if not line or line.endswith(b"\n"):
+            yield b""
+
+
+def _process_byte_rows(
+    iter_rows: Callable[[], Iterable[bytes]],
+) -> tuple[FlatGrid, tuple[int, int]]:
+    # Rows are read twice, first to validate and measure them, then to fill the grid.
+    # That way only the grid and one row need to be in memory at once.
+    row_count, columns, start_idx = _scan_byte_rows(iter_rows())
+    grid = FlatGrid.empty(row_count, columns)
+    for row_idx, row in enumerate(iter_rows()):
+        if not row.isascii():
+            row = row.decode("utf-8")
+        grid.fill_row(row_idx, row, blank=" ")
+    return grid, start_idx
+
+
+def _scan_byte_rows(rows: Iterable[bytes]) -> tuple[int, int, tuple[int, int]]:
+    # Validates rows, returns their count, the number of columns and start.
+    row_count = 0
+    columns = 0
+    found = {START: [], END: []}
+    for row_idx, row in enumerate(rows):
+        row_count += 1
+        if row.isascii():
+            invalid = row.translate(None, _VALID_ASCII_BYTES)
+            if invalid:
+                raise PathError(f"There is an invalid character: {chr(invalid[0])}")
+            text = row.decode("ascii")
+        else:
+            text = row.decode("utf-8", errors="replace")
+            _check_row(text)
+        columns = max(columns, len(text))
+        for sign, positions in found.items():
+            col_idx = text.find(sign)
+            while col_idx != -1 and len(positions) < 2:
+                positions.append((row_idx, col_idx))
+                col_idx = text.find(sign, col_idx + 1)
+    return row_count, columns, _pick_start(found[START], found[END])
+
+
+def _process_tiled(
+    path: str | os.PathLike, memory_budget: int
+) -> tuple[TiledGrid, tuple[int, int]]:
+    # Only offsets of rows are kept, tiles are read from the file later.
+    with open(path, "rb") as file:
+        if file.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC:
+            raise ValueError("Compressed maps can't be read in tiles")
+        size = os.fstat(file.fileno()).st_size
+        if not size:
+            return process_buffer(b"")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            row_starts = array("Q", [0])
+            for newline in _NEWLINE.finditer(mapped):
+                row_starts.append(newline.end())
+            # one more offset, as if there was a newline after the last row
+            row_starts.append(size + 1)
+            non_ascii_rows = set()
+
+            def iter_rows():
+                for row_idx in range(len(row_starts) - 1):
+                    row = mapped[row_starts[row_idx] : row_starts[row_idx + 1] - 1]
+                    if not row.isascii():
+                        non_ascii_rows.add(row_idx)
+                    yield row
+
+            _, columns, start_idx = _scan_byte_rows(iter_rows())
+    grid = TiledGrid(path, row_starts, columns, non_ascii_rows, memory_budget)
+    return grid, start_idx
+
+
+def _pick_start(
+    starts: list[tuple[int, int]], ends: list[tuple[int, int]]
+) -> tuple[int, int]:
+    # the first duplicate in reading order is reported, same as with lists
+    if len(starts) > 1 and (len(ends) < 2 or starts[1] < ends[1]):
+        raise PathError("Map should have exactly one start")
+    if len(ends) > 1:
+        raise PathError("Map should have exactly one end")
+    if not starts:
+        raise PathError("Map is missing a start")
+    if not ends:
+        raise PathError("Map is missing an end")
+    return starts[0]
@@ -1,6 +1,9 @@
 from typing import Iterable
 from enum import Enum
 
+from saona.grid import FlatGrid, SparseGrid
+from saona.tiled import TiledGrid
+
 
 class Direction(Enum):
     """Enumeration used to represent directions when navigating `RoadMap`."""
@@ -58,58 +61,188 @@ class RoadMap:
 
     To change the position, use methods `move` or `jump_to`.
     `RoadMap` tracks visited positions, use method `is_visited` to check if position was visited.
+    Visited cells are kept in attribute `visited`, a `Bitset` of cell ids,
+    or a `ChunkedBitset` when the grid is a `SparseGrid` or a `TiledGrid`.
+    Attribute `first_visit` tells whether the last `move` or `jump_to`
+    entered a cell which wasn't visited before.
+    Attribute `new_visits` counts moves which visited at least one new cell.
+    Method `reset` forgets all visited cells, so the same `RoadMap` can be used again.
 
     Method `iter_surroundings` offers a way to see usable cells around the current position.
 
+    Method `skip_run` moves over a whole run of identical characters at once.
+    Runs are found on first use and remembered, so repeated skips are cheap.
+
+    Internally every position is a cell id of the grid, see `FlatGrid`.
+    Methods with `cell` in their name work with cell ids directly,
+    they are faster and should be preferred when following a path.
+    Attribute `cell` holds the current cell id.
+
     Note that `RoadMap` doesn't know anything about used characters.
     Either cell has a character which means that cell is usable, or cell is unusable.
     """
 
-    def __init__(self, grid: list[list[str]], initial_position: tuple[int, int]):
+    def __init__(
+        self,
+        grid: list[list[str]] | FlatGrid | SparseGrid | TiledGrid,
+        initial_position: tuple[int, int],
+    ):
+        if isinstance(grid, list):
+            grid = FlatGrid.from_rows(grid)
         self._grid = grid
-        self.position = initial_position
-        self._visited = [[False] * len(row) for row in grid]
+        self._offsets = {
+            Direction.LEFT: -1,
+            Direction.UP: -grid.stride,
+            Direction.RIGHT: 1,
+            Direction.DOWN: grid.stride,
+        }
+        self.visited = grid.cell_set()
+        self._visited_bits = self.visited.bits
+        self._runs = {direction: {} for direction in Direction.get_all()}
+        self._jumps = {direction: {} for direction in Direction.get_all()}
+        self._initial_position = initial_position
+        self.cell = grid.cell_id(initial_position)
+        self.first_visit = False
+        self.new_visits = 0
+
+    def reset(self, initial_position: tuple[int, int] | None = None):
+        """Forget all visited cells and go to the initial position.
+
+        Initial position defaults to the one `RoadMap` was created with.
+        Memory is reused, nothing proportional to the grid is allocated.
+        """
+        if initial_position is not None:
+            self._initial_position = initial_position
+        self.visited.clear()
+        for jumps in self._jumps.values():
+            jumps.clear()
+        self.cell = self.cell_at(self._initial_position)
+        self.first_visit = False
+        self.new_visits = 0
+
+    @property
+    def position(self) -> tuple[int, int]:
+        """The current position."""
+        return self.position_of(self.cell)
+
+    def cell_at(self, position: tuple[int, int]) -> int:
+        """Convert a position to a cell id."""
+        return self._grid.cell_id(position)
+
+    def position_of(self, cell: int) -> tuple[int, int]:
+        """Convert a cell id to a position."""
+        return self._grid.position(cell)
+
+    def next_cell(self, direction: Direction, cell: int | None = None) -> int:
+        """Get a cell id next to the cell (current one by default) in a direction."""
+        if cell is None:
+            cell = self.cell
+        return cell + self._offsets[direction]
+
+    def char_at(self, cell: int) -> str:
+        """Retrieve a character in the cell, empty string if cell is unusable."""
+        return self._grid[cell]
 
     def jump_to(self, position: tuple[int, int]) -> str:
         """Go to any usuable cell."""
-        char = self[position]
+        return self.jump_to_cell(self.cell_at(position))
+
+    def jump_to_cell(self, cell: int) -> str:
+        """Go to any usuable cell, using its cell id."""
+        return self._enter(cell)
+
+    def move(self, direction: Direction) -> str:
+        """Move by one to an usuable cell in a direction."""
+        return self._enter(self.cell + self._offsets[direction])
+
+    def _enter(self, cell: int) -> str:
+        char = self._grid[cell]
         if not char:
             raise ValueError("Position cannot be set to an unusable cell")
-        self.position = position
-        self._visited[position[0]][position[1]] = True
+        self.cell = cell
+        byte = self._visited_bits[cell >> 3]
+        mask = 1 << (cell & 7)
+        if byte & mask:
+            self.first_visit = False
+        else:
+            self._visited_bits[cell >> 3] = byte | mask
+            self.first_visit = True
+            self.new_visits += 1
         return char
 
-    def move(self, direction: Direction) -> str:
-        """Move by one to an usuable cell in a direction."""
-        next_position = direction.next_position(self.position)
-        return self.jump_to(next_position)
+    def skip_run(self, direction: Direction) -> int:
+        """Move to the last cell of a run of identical characters in a direction.
+
+        All cells of the run become visited.
+        Returns by how many cells the position moved.
+        """
+        runs = self._runs[direction]
+        run_end = runs.get(self.cell)
+        if run_end is None:
+            run_end = self._grid.run_end(self.cell, self._offsets[direction])
+            runs[self.cell] = run_end
+        offset = self._offsets[direction]
+        count = (run_end - self.cell) // offset
+        if count:
+            first, last = sorted((self.cell + offset, run_end))
+            if not self.visited.add_range(first, last + 1, abs(offset)):
+                self.new_visits += 1
+            self.cell = run_end
+        return count
+
+    def next_unvisited_cell(self, cell: int, direction: Direction) -> int:
+        """Find the first cell after the cell in a direction which isn't visited.
+
+        Cells can only become visited, so every visited cell remembers how far
+        the scan got and later scans jump over it (union-find with path compression).
+        """
+        offset = self._offsets[direction]
+        jumps = self._jumps[direction]
+        bits = self._visited_bits
+        cell += offset
+        skipped = []
+        while bits[cell >> 3] >> (cell & 7) & 1:
+            skipped.append(cell)
+            cell = jumps.get(cell, cell + offset)
+        for visited in skipped:
+            jumps[visited] = cell
+        return cell
+
+    def chars_between(self, cell: int, direction: Direction) -> str:
+        """Characters of cells strictly between the current cell and the cell.
+
+        The cell has to be in the direction from the current cell
+        and all cells between them have to be usable.
+        """
+        offset = self._offsets[direction]
+        return self._grid.text(self.cell + offset, cell, offset)
 
     def is_visited(self, position: tuple[int, int]):
         """Check if position was ever visited."""
-        try:
-            return self._visited[position[0]][position[1]]
-        except IndexError:
-            return False
+        return self.is_cell_visited(self.cell_at(position))
+
+    def is_cell_visited(self, cell: int) -> bool:
+        """Check if cell was ever visited."""
+        return bool(self._visited_bits[cell >> 3] >> (cell & 7) & 1)
 
     def iter_surroundings(self) -> Iterable[tuple[Direction, tuple[int, int]]]:
         """Iterate over all usable surrounding cells.
 
         Checks all four directions around the current position.
         """
+        for direction, cell in self.iter_surrounding_cells():
+            yield direction, self.position_of(cell)
+
+    def iter_surrounding_cells(self) -> Iterable[tuple[Direction, int]]:
+        """Same as `iter_surroundings`, but with cell ids instead of positions."""
         for direction in Direction.get_all():
-            position = direction.next_position(self.position)
-            if not self[position]:
-                continue
-            yield direction, position
+            cell = self.cell + self._offsets[direction]
+            if self._grid[cell]:
+                yield direction, cell
 
     def __getitem__(self, position: tuple[int, int]):
         """Retrieve a charater at the position.
 
         If cell is unusable empty string is returned.
         """
-        if position[0] < 0 or position[1] < 0:
-            return ""
-        try:
-            return self._grid[position[0]][position[1]]
-        except IndexError:
-            return ""
+        return self._grid[self.cell_at(position)]
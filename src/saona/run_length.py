@@ -0,0 +1,184 @@
+import bisect
+import re
+from array import array
+from typing import Iterable, Iterator
+
+__all__ = ("RunLengthPath",)
+
+_MAGIC = b"RLP1"
+_RUN = re.compile(r"(.)\1*", re.DOTALL)
+
+
+class RunLengthPath:
+    """Path taken, stored as runs of identical characters.
+
+    Long corridors take one run instead of a character per cell.
+    Supports `len`, indexing, slicing and iteration over characters
+    without expanding the whole path, `str` expands it.
+    Slices are `RunLengthPath` too. Compares equal to the expanded string.
+
+    Method `to_bytes` serializes runs compactly, `from_bytes` reads them back.
+    """
+
+    def __init__(self, chars: Iterable[str] = (), counts: Iterable[int] = ()):
+        self._chars = list(chars)
+        # end of every run in the expanded path, to find runs by bisecting
+        self._ends = array("Q")
+        end = 0
+        for count in counts:
+            end += count
+            self._ends.append(end)
+        if len(self._chars) != len(self._ends):
+            raise ValueError("Every run needs a character and a count")
+
+    @classmethod
+    def from_str(cls, path: str) -> "RunLengthPath":
+        """Split an expanded path into runs."""
+        builder = _RunLengthBuilder("")
+        builder.append(path)
+        return builder.build()
+
+    def runs(self) -> Iterator[tuple[str, int]]:
+        """Iterate over runs as pairs of a character and a count."""
+        start = 0
+        for char, end in zip(self._chars, self._ends):
+            yield char, end - start
+            start = end
+
+    def to_bytes(self) -> bytes:
+        """Serialize runs, every run is a UTF-8 character and a varint count."""
+        out = bytearray(_MAGIC)
+        _write_varint(out, len(self._chars))
+        for char, count in self.runs():
+            out += char.encode("utf-8")
+            _write_varint(out, count)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RunLengthPath":
+        """Read runs serialized by `to_bytes`, raises `ValueError` if they are invalid."""
+        if data[: len(_MAGIC)] != _MAGIC:
+            raise ValueError("Data is not a serialized RunLengthPath")
+        try:
+            run_count, idx = _read_varint(data, len(_MAGIC))
+            chars = []
+            counts = []
+            for _ in range(run_count):
+                length = _utf8_length(data[idx])
+                chars.append(data[idx : idx + length].decode("utf-8"))
+                count, idx = _read_varint(data, idx + length)
+                counts.append(count)
+        except (IndexError, UnicodeDecodeError) as e:
+            raise ValueError("Serialized RunLengthPath is truncated or corrupted") from e
+        if idx != len(data):
+            raise ValueError("Serialized RunLengthPath has trailing data")
+        return cls(chars, counts)
+
+    def __len__(self):
+        return self._ends[-1] if self._ends else 0
+
+    def __getitem__(self, key: int | slice) -> "str | RunLengthPath":
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return RunLengthPath.from_str(str(self)[key])
+            return self._slice(start, stop)
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("RunLengthPath index out of range")
+        return self._chars[bisect.bisect_right(self._ends, key)]
+
+    def _slice(self, start: int, stop: int) -> "RunLengthPath":
+        if start >= stop:
+            return RunLengthPath()
+        first = bisect.bisect_right(self._ends, start)
+        last = bisect.bisect_left(self._ends, stop)
+        ends = self._ends[first : last + 1].tolist()
+        ends[-1] = stop
+        counts = [end - prev_end for prev_end, end in zip([start, *ends], ends)]
+        return RunLengthPath(self._chars[first : last + 1], counts)
+
+    def __iter__(self) -> Iterator[str]:
+        for char, count in self.runs():
+            for _ in range(count):
+                yield char
+
+    def __str__(self):
+        return "".join([char * count for char, count in self.runs()])
+
+    def __repr__(self):
+        return f"RunLengthPath({len(self._chars)} runs, {len(self)} characters)"
+
+    def __eq__(self, other):
+        if isinstance(other, RunLengthPath):
+            return self._chars == other._chars and self._ends == other._ends
+        if isinstance(other, str):
+            return len(self) == len(other) and str(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+
+class _RunLengthBuilder:
+    """Collects parts of a path as runs, used by `PathFinder` instead of a list."""
+
+    def __init__(self, start: str):
+        self._chars = []
+        self._counts = []
+        self._last = None
+        self.length = 0
+        if start:
+            self.append(start)
+
+    def append(self, part: str):
+        if len(part) == 1:
+            self.append_run(part, 1)
+            return
+        for match in _RUN.finditer(part):
+            self.append_run(match.group(1), match.end() - match.start())
+
+    def append_run(self, char: str, count: int):
+        self.length += count
+        if char == self._last:
+            self._counts[-1] += count
+        else:
+            self._chars.append(char)
+            self._counts.append(count)
+            self._last = char
+
+    def __len__(self):
+        return len(self._chars)
+
+    def build(self) -> RunLengthPath:
+        return RunLengthPath(self._chars, self._counts)
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, idx: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[idx]
+        idx += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, idx
+        shift += 7
+
+
+def _utf8_length(lead_byte: int) -> int:
+    if lead_byte < 0x80:
+        return 1
+    if lead_byte >> 5 == 0b110:
+        return 2
+    if lead_byte >> 4 == 0b1110:
+        return 3
+    return 4
@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from saona.batch import traverse_one
+from saona.util import PathError
+
+__all__ = ("TraversalService", "main", "serve")
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Content Too Large",
+    422: "Unprocessable Content",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class TraversalService:
+    """HTTP service which traverses maps in a pool of `workers` processes.
+
+    Endpoint `POST /traverse` takes a map as the request body and responds
+    with JSON holding letters and path, or an error if path can't be followed.
+    Endpoint `GET /stats` responds with counters and latency percentiles.
+
+    Maps wait in a queue of at most `queue_size` maps, only `workers` maps
+    are traversed at once. When the queue is full, requests are rejected
+    with status 429 right away instead of waiting behind other maps.
+    Requests with a body larger than `max_bytes` are rejected with status 413.
+    If a worker dies, the request fails with status 503 and a new pool is started.
+
+    Every map can be limited to `max_steps`, `max_path_length` and `timeout`
+    seconds of traversal, see `PathFinder.follow_path`. A map which exceeds
+    a limit is responded to with status 422, like any other `PathError`.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        queue_size: int = 64,
+        max_bytes: int = 16 * 1024 * 1024,
+        latency_window: int = 10_000,
+        max_steps: int | None = None,
+        max_path_length: int | None = None,
+        timeout: float | None = None,
+    ):
+        if queue_size < 1:
+            raise ValueError("Queue has to hold at least one map")
+        self.workers = workers or os.process_cpu_count()
+        self.max_bytes = max_bytes
+        self.limits = {"max_steps": max_steps, "max_path_length": max_path_length}
+        self.timeout = timeout
+        self.counters = dict.fromkeys(
+            (
+                "requests",
+                "traversed",
+                "path_errors",
+                "failures",
+                "rejected",
+                "too_large",
+            ),
+            0,
+        )
+        # latencies of the most recent traversals, in seconds
+        self._latencies = collections.deque(maxlen=latency_window)
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._pool = None
+        self._dispatchers = []
+
+    async def __aenter__(self):
+        self._pool = self._create_pool()
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch()) for _ in range(self.workers)
+        ]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        # waits for running maps, which shouldn't block other connections
+        await asyncio.to_thread(self._pool.shutdown, cancel_futures=True)
+
+    def _create_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        # Forked workers would inherit sockets of open connections,
+        # which then wouldn't close until the workers exit.
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    async def traverse(self, grid_str: str) -> tuple[int, dict]:
+        """Traverse a map in the pool, return HTTP status and JSON payload."""
+        self.counters["requests"] += 1
+        result = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((grid_str, result))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            return 429, {"error": "Too many maps are waiting, try again later"}
+        started = time.perf_counter()
+        outcome = await result
+        self._latencies.append(time.perf_counter() - started)
+        if isinstance(outcome, PathError):
+            self.counters["path_errors"] += 1
+            return 422, {"error": str(outcome)}
+        if isinstance(outcome, Exception):
+            self.counters["failures"] += 1
+            status = 503 if isinstance(outcome, BrokenProcessPool) else 500
+            return status, {"error": f"Map could not be traversed: {outcome!r}"}
+        self.counters["traversed"] += 1
+        letters, path = outcome
+        return 200, {"letters": letters, "path": path}
+
+    def stats(self) -> dict:
+        """Counters, current queue length and latency percentiles in milliseconds."""
+        latencies = sorted(self._latencies)
+        percentiles = {}
+        for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1)):
+            if latencies:
+                idx = min(len(latencies) - 1, int(fraction * len(latencies)))
+                percentiles[name] = latencies[idx] * 1000
+        return {
+            **self.counters,
+            "queued": self._queue.qsize(),
+            "latency_ms": percentiles,
+        }
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Serve HTTP/1.1 requests of one connection, keeping it alive between them."""
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> bool:
+        request_line = await reader.readline()
+        if not request_line:
+            return False
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close"
+
+        length = int(headers.get("content-length", 0))
+        if length > self.max_bytes:
+            self.counters["too_large"] += 1
+            # body is not read, so the connection can't be reused
+            await _respond(writer, 413, {"error": "Map is too large"}, False)
+            return False
+        body = await reader.readexactly(length)
+
+        if target == "/stats":
+            status, payload = 200, self.stats()
+        elif target != "/traverse":
+            status, payload = 404, {"error": f"Unknown endpoint {target}"}
+        elif method != "POST":
+            status, payload = 405, {"error": "Maps have to be sent with POST"}
+        else:
+            try:
+                grid_str = body.decode("utf-8")
+            except UnicodeDecodeError:
+                status, payload = 400, {"error": "Map has to be UTF-8 encoded"}
+            else:
+                status, payload = await self.traverse(grid_str)
+        await _respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    async def _dispatch(self):
+        # Each dispatcher keeps one worker busy, the rest waits in the queue.
+        loop = asyncio.get_running_loop()
+        while True:
+            grid_str, result = await self._queue.get()
+            pool = self._pool
+            options = dict(self.limits)
+            if self.timeout is not None:
+                # the map starts right away, a worker is free for each dispatcher
+                options["deadline"] = time.monotonic() + self.timeout
+            traverse = functools.partial(traverse_one, grid_str, **options)
+            try:
+                outcome = await loop.run_in_executor(pool, traverse)
+            except BrokenProcessPool as e:
+                outcome = e
+                # other dispatchers may have replaced it already
+                if self._pool is pool:
+                    self._pool = self._create_pool()
+                    pool.shutdown(wait=False, cancel_futures=True)
+            except Exception as e:
+                outcome = e
+            if not result.done():
+                result.set_result(outcome)
+
+
+async def _respond(
+    writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool
+):
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    unix_path: str | None = None,
+    **service_options,
+):
+    """Run `TraversalService` until cancelled, on a TCP port or a unix socket."""
+    async with TraversalService(**service_options) as service:
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(service.handle_connection, unix_path)
+        else:
+            server = await asyncio.start_server(service.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m saona.serve", description="Traverse maps over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", help="listen on a unix socket instead of a port")
+    parser.add_argument("--workers", type=int, help="processes, all CPUs by default")
+    parser.add_argument(
+        "--queue-size", type=int, default=64, help="maps waiting before rejecting"
+    )
+    parser.add_argument(
+        "--max-bytes", type=int, default=16 * 1024 * 1024, help="largest map accepted"
+    )
+    parser.add_argument("--max-steps", type=int, help="moves allowed for a map")
+    parser.add_argument(
+        "--max-path-length", type=int, help="characters allowed in a path"
+    )
+    parser.add_argument(
+        "--timeout", type=float, help="seconds allowed for traversing a map"
+    )
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                args.unix,
+                workers=args.workers,
+                queue_size=args.queue_size,
+                max_bytes=args.max_bytes,
+                max_steps=args.max_steps,
+                max_path_length=args.max_path_length,
+                timeout=args.timeout,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
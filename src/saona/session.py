@@ -0,0 +1,235 @@
+import bisect
+
+from saona.grid import FlatGrid
+from saona.path_finder import PathFinder
+from saona.preprocessor import _check_row, _find_end, _pick_start, process
+from saona.road_map import Direction, RoadMap
+from saona.util import END, START, PathError
+
+__all__ = ("MapSession",)
+
+
+class MapSession:
+    """Map which can be edited cell by cell and traversed again cheaply.
+
+    Use `set_cell` to change a cell and `traverse` to get the same result
+    as `saona.traverse` would return for the edited map.
+
+    While following the path, session remembers the first step which read
+    each cell and saves a checkpoint every `checkpoint_interval` steps.
+    After an edit, the path is followed again only from the last checkpoint
+    before the edited cell was read for the first time.
+    Editing a cell which was never read doesn't need any walking at all.
+
+    Initial map has to be valid, otherwise `PathError` is raised.
+    """
+
+    def __init__(self, grid_str: str, checkpoint_interval: int = 256):
+        grid, initial_position = process(grid_str, backend="flat")
+        self._grid = grid
+        self._map = _RecordingRoadMap(grid, initial_position)
+        self._path_finder = _CheckpointingPathFinder(checkpoint_interval)
+        self._starts = {self._map.cell}
+        self._ends = {grid.cell_id(_find_end(grid_str))}
+        self._walk_start = None
+        self._dirty_step = 0
+        self._result = None
+
+    def set_cell(self, row_idx: int, col_idx: int, char: str):
+        """Change a character at the position, space makes the cell unusable.
+
+        Raises `PathError` if character is not supported, then nothing changes.
+        """
+        if not (0 <= row_idx < self._grid.rows and 0 <= col_idx < self._grid.columns):
+            raise ValueError(f"Position {(row_idx, col_idx)} is outside of the map")
+        if len(char) != 1:
+            raise ValueError("Exactly one character has to be set")
+        _check_row(char)
+        cell = self._grid.cell_id((row_idx, col_idx))
+        if self._grid[cell] == char.strip():
+            return
+        self._grid.cells[cell] = 0 if char == " " else self._grid.code(char)
+        for cells, sign in ((self._starts, START), (self._ends, END)):
+            if char == sign:
+                cells.add(cell)
+            else:
+                cells.discard(cell)
+        self._map.forget_runs()
+        step = self._map.first_reads.get(cell)
+        if step is not None and (self._dirty_step is None or step < self._dirty_step):
+            self._dirty_step = step
+
+    def traverse(self) -> tuple[str, str]:
+        """Same as `saona.traverse` for the current state of the map."""
+        start = self._map.cell_at(
+            _pick_start(self._positions(self._starts), self._positions(self._ends))
+        )
+        if start != self._walk_start:
+            self._walk_start = start
+            self._result = self._path_finder.restart(self._map, start)
+        elif self._dirty_step is not None:
+            self._result = self._path_finder.rewind(self._dirty_step)
+        self._dirty_step = None
+        if isinstance(self._result, PathError):
+            raise self._result
+        return self._result
+
+    def _positions(self, cells: set[int]) -> list[tuple[int, int]]:
+        # only the first two are needed to report duplicates
+        return [self._grid.position(cell) for cell in sorted(cells)[:2]]
+
+
+class _RecordingRoadMap(RoadMap):
+    """`RoadMap` which records which cells were read and visited, in order.
+
+    Attribute `first_reads` maps every read cell to the value of attribute
+    `step` when it was read for the first time. Method `rewind` forgets
+    everything which happened after a point given by lengths of the logs.
+    """
+
+    def __init__(self, grid: FlatGrid, initial_position: tuple[int, int]):
+        super().__init__(grid, initial_position)
+        self.step = 0
+        self.first_reads = {}
+        # cells in order of their first read and cells which became visited
+        self.reads = []
+        self.visits = []
+
+    def restart(self, cell: int):
+        self.reset(self.position_of(cell))
+        self.step = 0
+        self.first_reads.clear()
+        self.reads.clear()
+        self.visits.clear()
+
+    def rewind(self, reads: int, visits: int):
+        for cell in self.reads[reads:]:
+            del self.first_reads[cell]
+        del self.reads[reads:]
+        for cell in self.visits[visits:]:
+            self.visited.discard(cell)
+        del self.visits[visits:]
+        # jumps over visited cells are only valid while cells stay visited
+        for jumps in self._jumps.values():
+            jumps.clear()
+
+    def forget_runs(self):
+        """Forget remembered runs, they are no longer valid after an edit."""
+        for runs in self._runs.values():
+            runs.clear()
+
+    def char_at(self, cell: int) -> str:
+        self._read(cell)
+        return super().char_at(cell)
+
+    def _enter(self, cell: int) -> str:
+        self._read(cell)
+        char = super()._enter(cell)
+        if self.first_visit:
+            self.visits.append(cell)
+        return char
+
+    def skip_run(self, direction: Direction) -> int:
+        offset = self._offsets[direction]
+        run_end = self._grid.run_end(self.cell, offset)
+        # cell after the run was read too, to find where the run ends
+        for cell in range(self.cell + offset, run_end + 2 * offset, offset):
+            self._read(cell)
+            if cell != run_end + offset and not self.is_cell_visited(cell):
+                self.visits.append(cell)
+        return super().skip_run(direction)
+
+    def iter_surrounding_cells(self):
+        for direction in Direction.get_all():
+            self._read(self.next_cell(direction))
+        return super().iter_surrounding_cells()
+
+    def _read(self, cell: int):
+        if cell not in self.first_reads:
+            self.first_reads[cell] = self.step
+            self.reads.append(cell)
+
+
+class _Checkpoint:
+    """State of `_CheckpointingPathFinder` after a number of steps."""
+
+    def __init__(self, path_finder: "_CheckpointingPathFinder"):
+        road_map = path_finder._map
+        self.steps = path_finder._steps
+        self.cell = road_map.cell
+        self.direction = path_finder._direction
+        self.path_length = len(path_finder._path)
+        self.letters_length = len(path_finder._letters)
+        self.loops = set(path_finder._possible_inifinite_loops)
+        self.marked_states = list(path_finder._marked_states)
+        self.new_visits = road_map.new_visits
+        self.visited_at_turn = path_finder._visited_at_turn
+        self.loop_start = path_finder._loop_start
+        self.cycle_found = path_finder._cycle_found
+        self.reads = len(road_map.reads)
+        self.visits = len(road_map.visits)
+
+
+class _CheckpointingPathFinder(PathFinder):
+    """`PathFinder` which saves checkpoints and can continue from them.
+
+    Results are returned and errors are returned as `PathError` instances.
+    """
+
+    def __init__(self, checkpoint_interval: int):
+        super().__init__()
+        self._interval = checkpoint_interval
+        self._checkpoints = []
+        self._steps = 0
+
+    def restart(self, road_map: _RecordingRoadMap, start: int):
+        road_map.restart(start)
+        self._checkpoints = []
+        self._steps = 0
+        try:
+            return self.follow_path(road_map)
+        except PathError as e:
+            return e
+
+    def rewind(self, step: int):
+        """Continue from the last checkpoint saved at or before the step."""
+        idx = bisect.bisect_right(self._checkpoints, step, key=lambda cp: cp.steps)
+        if not idx:
+            return self.restart(self._map, self._start)
+        del self._checkpoints[idx:]
+        checkpoint = self._checkpoints[-1]
+        self._map.rewind(checkpoint.reads, checkpoint.visits)
+        self._map.cell = checkpoint.cell
+        self._map.new_visits = checkpoint.new_visits
+        self._map.step = self._steps = checkpoint.steps
+        self._direction = checkpoint.direction
+        del self._path[checkpoint.path_length :]
+        self._letters.truncate(checkpoint.letters_length)
+        self._possible_inifinite_loops = set(checkpoint.loops)
+        self._forget_states()
+        for state in checkpoint.marked_states:
+            self._states.add(state)
+        self._marked_states = list(checkpoint.marked_states)
+        self._visited_at_turn = checkpoint.visited_at_turn
+        self._loop_start = checkpoint.loop_start
+        self._cycle_found = checkpoint.cycle_found
+        try:
+            return self._walk()
+        except PathError as e:
+            return e
+
+    def _initialize(
+        self,
+        road_map: RoadMap,
+        direction: Direction | None = None,
+        compact: bool | None = None,
+    ):
+        self._start = road_map.cell
+        super()._initialize(road_map, direction, compact)
+
+    def _analyze_next_move(self):
+        super()._analyze_next_move()
+        self._steps += 1
+        self._map.step = self._steps
+        if self._steps % self._interval == 0:
+            self._checkpoints.append(_Checkpoint(self))
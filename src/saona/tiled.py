@@ -0,0 +1,191 @@
+import collections
+import os
+from array import array
+
+from saona.grid import _ASCII_SYMBOLS, ChunkedBitset
+
+__all__ = ("TiledGrid",)
+
+# Tiles are 64x64 cells, so the tile of a cell is found by shifting bits.
+_TILE_BITS = 6
+_TILE = 1 << _TILE_BITS
+
+
+class TiledGrid:
+    """Readonly 2D grid of characters which is read from a file in tiles.
+
+    File holds the map as UTF-8 text, `row_starts` holds the offset
+    of every row in the file and one more offset after the end of the file.
+    Rows in `non_ascii_rows` are decoded whole when a tile of them is needed,
+    other rows are read only where a tile covers them.
+
+    Tiles of 64x64 cells are read when they are needed and the least recently
+    used ones are evicted when they would take more than `memory_budget` bytes.
+    Attributes `hits`, `misses` and `evictions` count tile switches
+    which found the tile in memory, had to read it, and tiles evicted.
+
+    Cell ids and symbol codes work the same as in `SparseGrid`.
+    Grid keeps the file open, use `close` or a `with` block to close it.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        row_starts: array,
+        columns: int,
+        non_ascii_rows: set[int] = frozenset(),
+        memory_budget: int = 64 * 1024 * 1024,
+    ):
+        self.rows = len(row_starts) - 1
+        self.columns = columns
+        self._column_bits = max(_TILE_BITS, (columns + 1).bit_length())
+        self._column_mask = (1 << self._column_bits) - 1
+        self.stride = 1 << self._column_bits
+        self.symbols = list(_ASCII_SYMBOLS)
+        self._codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+        self.memory_budget = memory_budget
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._row_starts = row_starts
+        self._non_ascii_rows = non_ascii_rows
+        self._fd = os.open(path, os.O_RDONLY)
+        self._tiles = collections.OrderedDict()
+        # the most recently used tile, most lookups stay in it
+        self._tile_key = None
+        self._tile = None
+
+    def close(self):
+        """Close the file, tiles can't be read anymore."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._tiles.clear()
+        self._tile_key = self._tile = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self) -> dict[str, int]:
+        """Counters and the number of tiles in memory."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "tiles": len(self._tiles),
+        }
+
+    def code(self, symbol: str) -> int:
+        """Get a code of the symbol, new symbols are assigned a new code."""
+        code = self._codes.get(symbol)
+        if code is None:
+            code = len(self.symbols)
+            if code == 256:
+                for key, tile in self._tiles.items():
+                    self._tiles[key] = array("H", iter(tile))
+                self._tile_key = self._tile = None
+            self.symbols.append(symbol)
+            self._codes[symbol] = code
+        return code
+
+    def run_end(self, cell: int, offset: int) -> int:
+        """Same as `FlatGrid.run_end`."""
+        char = self[cell]
+        while self[cell + offset] == char:
+            cell += offset
+        return cell
+
+    def text(self, start: int, stop: int, step: int) -> str:
+        """Same as `FlatGrid.text`."""
+        return "".join([self[cell] for cell in range(start, stop, step)])
+
+    def cell_id(self, position: tuple[int, int]) -> int:
+        """Same as `FlatGrid.cell_id`."""
+        row_idx, col_idx = position
+        if -1 <= row_idx <= self.rows and -1 <= col_idx <= self.columns:
+            return (row_idx + 1) << self._column_bits | col_idx + 1
+        return 0
+
+    def position(self, cell: int) -> tuple[int, int]:
+        """Same as `FlatGrid.position`."""
+        return (cell >> self._column_bits) - 1, (cell & self._column_mask) - 1
+
+    def cell_set(self) -> ChunkedBitset:
+        """Empty set for cell ids of this grid, allocated in chunks."""
+        return ChunkedBitset(len(self), self.stride)
+
+    def __len__(self):
+        """Number of cell ids, including the border and unused columns."""
+        return (self.rows + 2) << self._column_bits
+
+    def __getitem__(self, cell: int) -> str:
+        """Retrieve a character in the cell, empty string if cell is unusable."""
+        key = (
+            cell >> self._column_bits + _TILE_BITS << self._column_bits
+            | (cell & self._column_mask) >> _TILE_BITS
+        )
+        if key != self._tile_key:
+            self._switch_tile(key)
+        row_in_tile = cell >> self._column_bits & _TILE - 1
+        return self.symbols[self._tile[row_in_tile << _TILE_BITS | cell & _TILE - 1]]
+
+    def _switch_tile(self, key: int):
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self.hits += 1
+            self._tiles.move_to_end(key)
+        else:
+            self.misses += 1
+            tile = self._read_tile(key)
+            itemsize = tile.itemsize if isinstance(tile, array) else 1
+            # a few tiles are always kept, a cell and its neighbours can be in 3 tiles
+            max_tiles = max(4, self.memory_budget // (len(tile) * itemsize))
+            while len(self._tiles) >= max_tiles:
+                self._tiles.popitem(last=False)
+                self.evictions += 1
+            self._tiles[key] = tile
+        self._tile_key = key
+        self._tile = tile
+
+    def _read_tile(self, key: int) -> bytearray | array:
+        # Cell ids start at 1 in both directions, because of the border,
+        # so the first tile row and column include the border.
+        first_row = (key >> self._column_bits << _TILE_BITS) - 1
+        first_col = ((key & self._column_mask) << _TILE_BITS) - 1
+        tile = bytearray(_TILE * _TILE)
+        if self.rows <= first_row or self.columns <= first_col:
+            return self._as_tile_type(tile)
+        codes_by_row = []
+        for row_idx in range(max(0, first_row), min(self.rows, first_row + _TILE)):
+            start_col = max(0, first_col)
+            codes = self._read_row(row_idx, start_col, first_col + _TILE)
+            tile_offset = (row_idx - first_row) * _TILE + start_col - first_col
+            codes_by_row.append((tile_offset, codes))
+        tile = self._as_tile_type(tile)
+        for tile_offset, codes in codes_by_row:
+            if isinstance(tile, array):
+                codes = array("H", codes if isinstance(codes, list) else iter(codes))
+            tile[tile_offset : tile_offset + len(codes)] = codes
+        return tile
+
+    def _read_row(
+        self, row_idx: int, start_col: int, stop_col: int
+    ) -> bytes | list[int]:
+        row_start = self._row_starts[row_idx]
+        row_end = self._row_starts[row_idx + 1] - 1
+        if row_idx in self._non_ascii_rows:
+            text = os.pread(self._fd, row_end - row_start, row_start).decode("utf-8")
+            piece = text[start_col:stop_col]
+            return [0 if char == " " else self.code(char) for char in piece]
+        length = min(stop_col, row_end - row_start) - start_col
+        if length <= 0:
+            return b""
+        return os.pread(self._fd, length, row_start + start_col).replace(b" ", b"\0")
+
+    def _as_tile_type(self, tile: bytearray) -> bytearray | array:
+        if len(self.symbols) > 256:
+            return array("H", iter(tile))
+        return tile
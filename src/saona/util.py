@@ -2,6 +2,58 @@ class PathError(Exception):
     pass
 
 
+class TraversalLimitError(PathError):
+    """Traversal was stopped by a limit before reaching the end.
+
+    Attributes `steps`, `path_length` and `position` tell how far it got.
+    """
+
+    def __init__(
+        self, reason: str, steps: int, path_length: int, position: tuple[int, int]
+    ):
+        super().__init__(
+            f"{reason}, stopped at {position} after {steps} steps"
+            f" and {path_length} characters of path"
+        )
+        self.reason = reason
+        self.steps = steps
+        self.path_length = path_length
+        self.position = position
+
+    def __reduce__(self):
+        # errors are pickled when they are sent back from worker processes
+        return type(self), (self.reason, self.steps, self.path_length, self.position)
+
+
+class StepLimitExceeded(TraversalLimitError):
+    """Path needs more steps than `max_steps`."""
+
+
+class DeadlineExceeded(TraversalLimitError):
+    """Traversal was still walking at its `deadline`."""
+
+
+class TraversalCancelled(TraversalLimitError):
+    """Traversal was cancelled through a `CancellationToken`."""
+
+
+class PathLengthExceeded(TraversalLimitError):
+    """Path taken is longer than `max_path_length` characters."""
+
+
+class CancellationToken:
+    """Flag which cancels traversals it is passed to, for example from another thread.
+
+    Traversals check it every few hundred steps.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
 START = "@"
 END = "x"
 TURN = "+"
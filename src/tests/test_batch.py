@@ -0,0 +1,72 @@
+from saona import iter_traverse_many, traverse, traverse_as_completed, traverse_many
+from saona.util import PathError, StepLimitExceeded
+
+GRIDS = [
+    """
+  @---A---+
+          |
+  x-B-+   C
+      |   |
+      +---+
+""",
+    "@-A-+-B-x",
+    """
+  @-A--+
+       |
+       +-B--x-C--D
+""",
+    "x-B-@-A-x",
+    "@-Š-x",
+]
+
+
+def _expected():
+    results = []
+    for grid in GRIDS:
+        try:
+            results.append(traverse(grid))
+        except PathError as e:
+            results.append(str(e))
+    return results
+
+
+def _comparable(result):
+    return str(result) if isinstance(result, PathError) else result
+
+
+def test_traverse_many():
+    results = traverse_many(GRIDS, workers=2)
+    assert [_comparable(result) for result in results] == _expected()
+    assert isinstance(results[1], PathError)
+
+    results = traverse_many(iter(GRIDS * 3), workers=2, chunksize=2)
+    assert [_comparable(result) for result in results] == _expected() * 3
+
+    assert traverse_many([], workers=2) == []
+
+
+def test_iter_traverse_many():
+    results = iter_traverse_many(GRIDS * 5, workers=2, chunksize=3)
+    assert [_comparable(result) for result in results] == _expected() * 5
+
+
+def test_traverse_as_completed():
+    results = dict(traverse_as_completed(GRIDS * 5, workers=3, chunksize=2))
+    assert sorted(results) == list(range(len(GRIDS) * 5))
+    expected = _expected() * 5
+    assert all(_comparable(results[idx]) == expected[idx] for idx in results)
+
+
+def test_iter_traverse_many_timed():
+    results = list(iter_traverse_many(GRIDS, workers=2, timed=True))
+    assert [_comparable(result) for result, _ in results] == _expected()
+    assert all(seconds >= 0 for _, seconds in results)
+
+
+def test_traverse_many_options():
+    results = traverse_many(GRIDS, workers=2, validate="lazy", compact=True)
+    assert [_comparable(result) for result in results] == _expected()
+    assert not isinstance(results[0][1], str)
+
+    results = dict(traverse_as_completed(GRIDS[:1], workers=1, max_steps=3))
+    assert isinstance(results[0], StepLimitExceeded)
@@ -0,0 +1,57 @@
+import math
+
+import pytest
+
+from benchmarks.generators import blocked_tunnels, jagged, lattice, spiral, tunnels
+from saona.metrics import TraversalMetrics, traverse_with_metrics
+
+# Walking has to stay linear in the length of the path, anything accidentally
+# quadratic shows up as an exponent close to 2. Counts of operations are exact,
+# unlike time, so they are measured instead.
+MAX_OPERATIONS_EXPONENT = 1.3
+SIZES = (1, 2, 4, 8)
+
+
+def jagged_canvas(size: int) -> str:
+    """Staircase in a wide canvas, every row is longer than the previous one."""
+    steps = 200 * size
+    rows = jagged(steps).split("\n")
+    return "\n".join(row.ljust(2 * steps + len(row)) for row in rows)
+
+
+FAMILIES = {
+    "spiral": lambda size: spiral(40 * size),
+    "tunnels": lambda size: tunnels(20 * size, 10 * size),
+    "jagged_canvas": jagged_canvas,
+    "lattice": lambda size: lattice(40 * size, 10 * size),
+    "blocked_tunnels": lambda size: blocked_tunnels(20 * size),
+}
+
+
+def _walk(grid_str: str) -> tuple[int, int]:
+    # Returns the length of the path and operations counted by metrics.
+    # Cells of tunnels are counted even when they are jumped over, so they are
+    # not operations, visited bits read while jumping are.
+    metrics = TraversalMetrics()
+    _, path = traverse_with_metrics(grid_str, metrics)
+    counters = metrics.counters
+    return len(path), sum(counters.values()) - counters["tunnel_cells"]
+
+
+def _exponent(sizes: list[int], costs: list[float]) -> float:
+    # slope of a least squares line through log-log points
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(cost) for cost in costs]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum(
+        (x - mean_x) ** 2 for x in xs
+    )
+
+
+@pytest.mark.parametrize("family", FAMILIES)
+def test_walking_is_linear(family):
+    lengths, operations = zip(*(_walk(FAMILIES[family](size)) for size in SIZES))
+    # every family doubles the path at least once, so there is growth to measure
+    assert lengths[-1] >= 4 * lengths[0]
+    assert _exponent(lengths, operations) <= MAX_OPERATIONS_EXPONENT
@@ -0,0 +1,56 @@
+import gzip
+import io
+
+import pytest
+
+from saona import traverse, traverse_buffer, traverse_file, traverse_to
+from saona.util import PathError
+
+GRID = """
+  @---A---+
+          |
+  x-B-+   C
+      |   |
+      +---+
+"""
+
+
+def test_traverse_buffer():
+    assert traverse_buffer(GRID.encode()) == ("ACB", "@---A---+|C|+---+|+-B-x")
+    assert traverse_buffer(memoryview(b"@-\xc5\xa0-x")) == ("Š", "@-Š-x")
+    with pytest.raises(PathError):
+        traverse_buffer(b"@-A-+-B-x")
+
+
+def test_traverse_file(tmp_path):
+    path = tmp_path / "map.txt"
+    path.write_text(GRID)
+    assert traverse_file(path) == ("ACB", "@---A---+|C|+---+|+-B-x")
+
+    assert traverse_file(path, memory_budget=0) == ("ACB", "@---A---+|C|+---+|+-B-x")
+
+    path = tmp_path / "map.txt.gz"
+    path.write_bytes(gzip.compress(GRID.encode()))
+    assert traverse_file(path) == ("ACB", "@---A---+|C|+---+|+-B-x")
+    with pytest.raises(ValueError):
+        traverse_file(path, memory_budget=1024)
+
+
+def test_traverse_lazy():
+    grid = GRID + "\n  ?_"
+    with pytest.raises(PathError):
+        traverse(grid)
+    assert traverse(grid, validate="lazy") == ("ACB", "@---A---+|C|+---+|+-B-x")
+    with pytest.raises(PathError, match="invalid character: a"):
+        traverse("@-a-x", validate="lazy")
+
+
+def test_traverse_to():
+    stream = io.StringIO()
+    assert traverse_to(GRID, stream, batch_size=3) == "ACB"
+    assert stream.getvalue() == "@---A---+|C|+---+|+-B-x"
+
+    stream = io.StringIO()
+    with pytest.raises(PathError):
+        traverse_to("@-A-- -x", stream)
+    assert stream.getvalue() == "@-A--"
@@ -0,0 +1,127 @@
+import io
+import time
+
+import pytest
+
+from benchmarks.generators import jagged, serpentine
+from saona import traverse, traverse_to
+from saona.metrics import TraversalMetrics
+from saona.util import (
+    CancellationToken,
+    DeadlineExceeded,
+    PathError,
+    PathLengthExceeded,
+    StepLimitExceeded,
+    TraversalCancelled,
+    TraversalLimitError,
+)
+
+GRID = """
+  @---A---+
+          |
+  x-B-+   C
+      |   |
+      +---+
+"""
+PATH = "@---A---+|C|+---+|+-B-x"
+
+
+def test_max_steps():
+    metrics = TraversalMetrics()
+    assert traverse(GRID, metrics) == ("ACB", PATH)
+    moves = metrics.counters["moves"]
+    assert traverse(GRID, max_steps=moves) == ("ACB", PATH)
+    with pytest.raises(StepLimitExceeded) as error:
+        traverse(GRID, max_steps=moves - 1)
+    assert error.value.steps == moves - 1
+    assert error.value.position == (3, 3)
+    assert isinstance(error.value, PathError)
+
+    # limits work with metrics too
+    with pytest.raises(StepLimitExceeded):
+        traverse(GRID, TraversalMetrics(), max_steps=3)
+
+    # a corridor or a tunnel passed at once is a single step
+    assert moves < len(PATH) - 1
+
+
+def test_limits_of_compact_paths():
+    # all turns of a staircase merge into one run of a compact path,
+    # so limits can't count runs instead of moves
+    grid_str = jagged(5000)
+    metrics = TraversalMetrics()
+    traverse(grid_str, metrics)
+    moves = metrics.counters["moves"]
+    assert traverse(grid_str, compact=True, max_steps=moves)[1][-1] == "x"
+    with pytest.raises(StepLimitExceeded) as error:
+        traverse(grid_str, compact=True, max_steps=moves - 1)
+    assert error.value.steps == moves - 1
+    with pytest.raises(StepLimitExceeded):
+        traverse(grid_str, compact=True, max_steps=1000)
+
+    with pytest.raises(PathLengthExceeded) as error:
+        traverse(grid_str, compact=True, max_path_length=1000)
+    assert error.value.path_length <= 1000 + 1024
+
+    with pytest.raises(DeadlineExceeded):
+        traverse(grid_str, compact=True, deadline=time.monotonic())
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(TraversalCancelled):
+        traverse(grid_str, compact=True, cancel=token)
+
+
+def test_limits_of_streamed_paths():
+    stream = io.StringIO()
+    assert traverse_to(GRID, stream, batch_size=2, max_steps=100) == "ACB"
+    assert stream.getvalue() == PATH
+
+    stream = io.StringIO()
+    with pytest.raises(StepLimitExceeded) as error:
+        traverse_to(GRID, stream, batch_size=2, max_steps=3)
+    assert error.value.steps == 3
+    # the path leading to the limit was written
+    assert PATH.startswith(stream.getvalue()) and len(stream.getvalue()) > 1
+
+    grid_str = serpentine(100, 2000)
+    with pytest.raises(PathLengthExceeded) as error:
+        traverse_to(grid_str, io.StringIO(), max_path_length=1000)
+    assert 1000 < error.value.path_length <= 1000 + 1024 + 100
+    with pytest.raises(PathLengthExceeded):
+        traverse_to(GRID, io.StringIO(), batch_size=1, max_path_length=len(PATH) - 1)
+
+
+def test_max_path_length():
+    assert traverse(GRID, max_path_length=len(PATH)) == ("ACB", PATH)
+    for compact in (False, True):
+        with pytest.raises(PathLengthExceeded) as error:
+            traverse(GRID, compact=compact, max_path_length=len(PATH) - 1)
+        assert error.value.path_length == len(PATH)
+
+    # long paths are stopped while walking, corridors are measured before
+    # they are added, so the path grows at most about a thousand characters
+    # past the limit, plus the corridor which was about to be added
+    for width in (100, 400, 2000):
+        grid_str = serpentine(width, 200)
+        assert traverse(grid_str)[1][-1] == "x"
+        for compact in (False, True):
+            with pytest.raises(PathLengthExceeded) as error:
+                traverse(grid_str, compact=compact, max_path_length=1000)
+            assert error.value.path_length <= 1000 + 1024 + width
+
+
+def test_deadline_and_cancel():
+    grid_str = serpentine(100, 2000)
+    with pytest.raises(DeadlineExceeded) as error:
+        traverse(grid_str, deadline=time.monotonic())
+    assert error.value.steps == 0
+
+    token = CancellationToken()
+    assert traverse(GRID, cancel=token) == ("ACB", PATH)
+    token.cancel()
+    with pytest.raises(TraversalCancelled):
+        traverse(grid_str, cancel=token)
+
+    # every limit error is a `TraversalLimitError` which tells where it stopped
+    with pytest.raises(TraversalLimitError, match=r"stopped at \(0, 0\) after 0 steps"):
+        traverse(grid_str, cancel=token)
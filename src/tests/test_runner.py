@@ -0,0 +1,116 @@
+import importlib.util
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+RUNNER = pathlib.Path(__file__).parents[2] / "runner.py"
+GRID = """
+  @---A---+
+          |
+  x-B-+   C
+      |   |
+      +---+
+"""
+PATH = "@---A---+|C|+---+|+-B-x"
+
+
+def _run(*args: str, stdin: str = "", env: dict | None = None) -> str:
+    return subprocess.run(
+        [sys.executable, str(RUNNER), *args],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    ).stdout
+
+
+def _results(output: str) -> list[tuple]:
+    return [
+        (result["id"], result["letters"], result["path"], result["error"])
+        for result in map(json.loads, output.splitlines())
+    ]
+
+
+def test_single_map():
+    output = _run(GRID)
+    assert "Collected letters: ACB" in output
+    assert f"Path followed: {PATH}" in output
+    assert "Failed to follow the path" in _run("@-A")
+
+
+def test_stdin():
+    assert _results(_run("--stdin", stdin=GRID)) == [("stdin", "ACB", PATH, None)]
+
+
+def test_files(tmp_path):
+    first = tmp_path / "first.txt"
+    first.write_text(GRID)
+    second = tmp_path / "second.txt"
+    second.write_text("@-A-+-B-x")
+    missing = tmp_path / "missing.txt"
+    results = _results(_run("--file", str(first), str(missing), str(second)))
+    assert results[0] == (str(first), "ACB", PATH, None)
+    assert results[1][0] == str(missing) and "Invalid file" in results[1][3]
+    assert results[2][0] == str(second) and "it should turn" in results[2][3]
+
+
+def test_jsonl(tmp_path):
+    lines = [
+        json.dumps({"id": "a", "grid": GRID}),
+        "not json",
+        json.dumps({"id": "b", "grid": 42}),
+        "",
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"grid": "@-A-x"}),
+        json.dumps({"id": "c"}),
+    ]
+    maps = tmp_path / "maps.jsonl"
+    maps.write_text("\n".join(lines))
+    output = tmp_path / "results.jsonl"
+    for args in (["--jsonl", str(maps)], ["--jsonl", str(maps), "--workers", "2"]):
+        _run(*args, "--output", str(output))
+        results = _results(output.read_text())
+        assert [result[0] for result in results] == ["a", 2, 3, 5, 6, 7]
+        assert results[0] == ("a", "ACB", PATH, None)
+        assert results[4] == (6, "A", "@-A-x", None)
+        for _, letters, _, error in results[1:4] + results[5:]:
+            assert letters is None and error.startswith("Invalid record on line")
+        assert "not a string" in results[2][3]
+
+    # from stdin
+    assert _results(_run("--jsonl", "-", stdin=lines[0])) == [("a", "ACB", PATH, None)]
+
+
+def test_output_is_utf8(tmp_path):
+    maps = tmp_path / "maps.jsonl"
+    maps.write_text(json.dumps({"id": "š", "grid": "@-Š-x"}), encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+    # files opened with the locale encoding are errors
+    env = {
+        **os.environ,
+        "PYTHONWARNDEFAULTENCODING": "1",
+        "PYTHONWARNINGS": "error::EncodingWarning",
+    }
+    _run("--jsonl", str(maps), "--output", str(output), env=env)
+    result = json.loads(output.read_text(encoding="utf-8"))
+    assert (result["id"], result["letters"]) == ("š", "Š")
+
+
+def test_invalid_records_are_written_right_away():
+    spec = importlib.util.spec_from_file_location("runner", RUNNER)
+    runner = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(runner)
+    written = []
+
+    def records():
+        yield "bad", ValueError("first")
+        # nothing is being traversed, so it doesn't wait for a map
+        assert [result["id"] for result in written] == ["bad"]
+        yield "map", GRID
+        yield "worse", ValueError("second")
+
+    runner._traverse_records(records(), 2, 1, written.append)
+    assert [result["id"] for result in written] == ["bad", "map", "worse"]
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import multiprocessing
+
+from saona.serve import TraversalService
+
+GRID = """
+  @---A---+
+          |
+  x-B-+   C
+      |   |
+      +---+
+"""
+
+
+async def _request(port: int, method: str, target: str, body: bytes = b"") -> tuple:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode() + body
+    )
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_serve():
+    async def run():
+        async with TraversalService(workers=1, max_bytes=1000) as service:
+            server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                assert await _request(port, "POST", "/traverse", GRID.encode()) == (
+                    200,
+                    {"letters": "ACB", "path": "@---A---+|C|+---+|+-B-x"},
+                )
+                status, payload = await _request(port, "POST", "/traverse", b"@-x @")
+                assert status == 422 and "start" in payload["error"]
+                status, _ = await _request(port, "POST", "/traverse", b"@" * 1001)
+                assert status == 413
+                status, _ = await _request(port, "GET", "/unknown")
+                assert status == 404
+
+                status, stats = await _request(port, "GET", "/stats")
+                assert status == 200
+                assert stats["traversed"] == 1
+                assert stats["path_errors"] == 1
+                assert stats["too_large"] == 1
+                assert set(stats["latency_ms"]) == {"p50", "p90", "p99", "max"}
+
+    asyncio.run(run())
+
+
+def test_serve_rejects_when_queue_is_full():
+    async def run():
+        async with TraversalService(workers=1, queue_size=1) as service:
+            results = await asyncio.gather(*(service.traverse(GRID) for _ in range(4)))
+            statuses = [status for status, _ in results]
+            # the first map fills the queue before a worker takes it
+            assert statuses == [200, 429, 429, 429]
+            assert service.stats()["rejected"] == 3
+
+    asyncio.run(run())
+
+
+def test_serve_recovers_from_dead_workers():
+    async def run():
+        async with TraversalService(workers=1) as service:
+            assert (await service.traverse(GRID))[0] == 200
+            for worker in multiprocessing.active_children():
+                worker.kill()
+                worker.join()
+            status, payload = await service.traverse(GRID)
+            assert status == 503 and "BrokenProcessPool" in payload["error"]
+            # a new pool takes over
+            assert (await service.traverse(GRID))[0] == 200
+            assert service.stats()["failures"] == 1
+
+    asyncio.run(run())
+
+
+def test_serve_limits():
+    async def run():
+        async with TraversalService(workers=1, max_steps=3) as service:
+            status, payload = await service.traverse(GRID)
+            assert status == 422 and "Step budget" in payload["error"]
+            assert (await service.traverse("@-x"))[0] == 200
+        async with TraversalService(workers=1, timeout=0) as service:
+            status, payload = await service.traverse(GRID)
+            assert status == 422 and "Deadline" in payload["error"]
+
+    asyncio.run(run())
@@ -0,0 +1,120 @@
+import concurrent.futures
+
+import pytest
+
+from saona.cache import TraversalCache, _normalize
+from saona.run_length import RunLengthPath
+from saona.util import (
+    CancellationToken,
+    PathError,
+    StepLimitExceeded,
+    TraversalCancelled,
+)
+
+GRID = """
+  @---A---+
+          |
+  x-B-+   C
+      |   |
+      +---+
+"""
+
+
+def test_cache():
+    cache = TraversalCache()
+    assert cache.traverse(GRID) == ("ACB", "@---A---+|C|+---+|+-B-x")
+    assert cache.traverse(GRID) == ("ACB", "@---A---+|C|+---+|+-B-x")
+    # trailing spaces and empty rows don't matter
+    assert cache.traverse(GRID.replace("\n", "   \n") + "\n\n")
+    assert cache.stats() == {
+        "hits": 2,
+        "disk_hits": 0,
+        "misses": 1,
+        "evictions": 0,
+        "entries": 1,
+        "bytes": cache.stats()["bytes"],
+    }
+
+    # maps without anything to strip are not copied
+    grid_str = GRID.strip("\n")
+    assert _normalize(grid_str) is grid_str
+
+    # errors are cached too
+    for _ in range(2):
+        with pytest.raises(PathError, match="it should turn"):
+            cache.traverse("@-A-+-B-x")
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_cache_eviction():
+    cache = TraversalCache(max_entries=2)
+    for grid_str in ("@-x", "@-A-x", "@-B-x", "@-x"):
+        cache.traverse(grid_str)
+    assert (cache.hits, cache.misses, cache.evictions) == (0, 4, 2)
+
+    cache = TraversalCache(max_bytes=1)
+    cache.traverse("@-x")
+    assert cache.stats()["entries"] == 0
+    assert cache.evictions == 1
+
+
+def test_cache_on_disk(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    with TraversalCache(path=path) as cache:
+        cache.traverse(GRID)
+        with pytest.raises(PathError):
+            cache.traverse("@-A")
+
+    with TraversalCache(path=path) as cache:
+        assert cache.traverse(GRID) == ("ACB", "@---A---+|C|+---+|+-B-x")
+        with pytest.raises(PathError, match="missing an end"):
+            cache.traverse("@-A")
+        assert (cache.disk_hits, cache.misses) == (2, 0)
+        # now it is in memory too
+        cache.traverse(GRID)
+        assert cache.hits == 1
+
+
+def test_cache_options(tmp_path):
+    # invalid character off the path fails only with strict validation
+    grid_str = "@-A-x\n\n    ?"
+    with TraversalCache(path=tmp_path / "cache.sqlite") as cache:
+        with pytest.raises(PathError):
+            cache.traverse(grid_str)
+        assert cache.traverse(grid_str, validate="lazy") == ("A", "@-A-x")
+        path = cache.traverse(GRID, compact=True)[1]
+        assert isinstance(path, RunLengthPath)
+        assert path == "@---A---+|C|+---+|+-B-x"
+        assert cache.misses == 3
+
+        for _ in range(2):
+            with pytest.raises(StepLimitExceeded) as error:
+                cache.traverse(GRID, max_steps=3)
+        assert error.value.steps == 3
+        assert (cache.hits, cache.misses) == (1, 4)
+
+        # cancellation depends on the caller, so it is never cached
+        token = CancellationToken()
+        token.cancel()
+        with pytest.raises(TraversalCancelled):
+            cache.traverse("@-x", cancel=token)
+        assert cache.traverse("@-x") == ("", "@-x")
+
+    # error types survive the database too
+    with TraversalCache(path=tmp_path / "cache.sqlite") as cache:
+        with pytest.raises(StepLimitExceeded) as disk_error:
+            cache.traverse(GRID, max_steps=3)
+        assert str(disk_error.value) == str(error.value)
+        assert disk_error.value.position == error.value.position
+        assert cache.disk_hits == 1
+
+
+def test_cache_shared_between_threads(tmp_path):
+    grids = [f"@-{letter}-x" for letter in "ABCD"] * 8
+    with TraversalCache(max_entries=2, path=tmp_path / "cache.sqlite") as cache:
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(cache.traverse, grids))
+        assert results == [(grid_str[2], grid_str) for grid_str in grids]
+        stats = cache.stats()
+        assert stats["hits"] + stats["disk_hits"] + stats["misses"] == len(grids)
+        assert stats["entries"] == 2
@@ -0,0 +1,54 @@
+import pickle
+
+import pytest
+
+from saona.compiler import compile_map
+from saona.util import PathError
+
+
+def test_compile_map():
+    compiled = compile_map("""
+  @---A---+
+          |
+  x-B-+   C
+      |   |
+      +---+
+""")
+    assert compiled.traverse() == ("ACB", "@---A---+|C|+---+|+-B-x")
+    assert compiled.nodes[(1, 2)] == "@"
+    assert compiled.nodes[(3, 2)] == "x"
+    assert compiled.edges[0] == ((1, 2), (1, 6), "---A", "A")
+    assert compiled.edges[-1] == ((3, 4), (3, 2), "-x", "")
+
+    # the path is joined once, when the map is compiled
+    assert compiled.traverse() is compiled.traverse()
+
+    # can be reused after pickling
+    compiled = pickle.loads(pickle.dumps(compiled))
+    assert compiled.traverse() == ("ACB", "@---A---+|C|+---+|+-B-x")
+
+
+def test_compile_tunnel():
+    compiled = compile_map("""
+  @
+x-|-+
+  +-A
+""")
+    assert compiled.traverse() == ("A", "@|+-A+-|-x")
+    # tunnel entry is a node, the tunnel itself is a part of the edge after it
+    assert compiled.edges[-2:] == [
+        ((2, 4), (2, 3), "-", ""),
+        ((2, 3), (2, 0), "|-x", ""),
+    ]
+
+
+def test_compile_invalid():
+    compiled = compile_map("@-A-+-B-x")
+    with pytest.raises(PathError, match="it should turn"):
+        compiled.traverse()
+
+    # invalid maps are reported the same way, when traversed
+    compiled = compile_map("@-A")
+    assert compiled.nodes == {} and compiled.edges == []
+    with pytest.raises(PathError):
+        compiled.traverse()
@@ -0,0 +1,132 @@
+from saona.grid import Bitset, ChunkedBitset, FlatGrid, SparseGrid
+
+
+def test_flat_grid():
+    grid = FlatGrid.from_rows(["@-+", " Š", "", "x"], blank=" ")
+    assert grid.rows == 4
+    assert grid.columns == 3
+
+    cell = grid.cell_id((0, 0))
+    assert grid[cell] == "@"
+    assert grid.position(cell) == (0, 0)
+    assert grid[grid.cell_id((1, 1))] == "Š"
+    # blank and missing cells of jagged rows are unusable
+    assert grid[grid.cell_id((1, 0))] == ""
+    assert grid[grid.cell_id((1, 2))] == ""
+    assert grid[grid.cell_id((3, 0))] == "x"
+
+    # neighbours of cells on the edge are always in the border
+    assert grid[grid.cell_id((0, 0)) - 1] == ""
+    assert grid[grid.cell_id((0, 0)) - grid.stride] == ""
+    assert grid[grid.cell_id((3, 2)) + grid.stride] == ""
+    # anything further away is unusable too
+    assert grid.cell_id((100, 100)) == 0
+    assert grid.cell_id((-5, 0)) == 0
+    assert grid[0] == ""
+
+    # one byte per cell
+    assert len(grid) == len(grid.cells) == 6 * 5
+
+
+def test_flat_grid_from_lists():
+    rows = [["@", "-", "A"], ["", "+", "+"], ["", "x", ""]]
+    grid = FlatGrid.from_rows(rows)
+    assert [[grid[grid.cell_id((r, c))] for c in range(3)] for r in range(3)] == rows
+
+
+def test_flat_grid_many_symbols():
+    letters = [chr(code) for code in range(0x400, 0x600)]
+    grid = FlatGrid.from_rows([letters])
+    assert all(grid[grid.cell_id((0, idx))] == char for idx, char in enumerate(letters))
+
+
+def test_flat_grid_run_end():
+    grid = FlatGrid.from_rows(["+---+", "|   |", "|   +-", "+----"], blank=" ")
+    cell = grid.cell_id((0, 1))
+    assert grid.position(grid.run_end(cell, 1)) == (0, 3)
+    assert grid.position(grid.run_end(grid.cell_id((0, 3)), -1)) == (0, 1)
+    assert grid.position(grid.run_end(grid.cell_id((1, 0)), grid.stride)) == (2, 0)
+    assert grid.position(grid.run_end(grid.cell_id((3, 4)), -1)) == (3, 1)
+    # single character run
+    assert grid.run_end(grid.cell_id((0, 0)), 1) == grid.cell_id((0, 0))
+
+
+def test_bitset():
+    bitset = Bitset(100)
+    assert 5 not in bitset
+    assert not bitset.add(5)
+    assert bitset.add(5)
+    assert 5 in bitset
+    assert 4 not in bitset and 6 not in bitset
+    assert len(bitset.bits) == 13
+
+    assert not bitset.add_range(3, 90)
+    assert all(idx in bitset for idx in range(3, 90))
+    assert 2 not in bitset and 90 not in bitset
+    assert len(bitset) == 87
+    assert bitset.add_range(4, 89)
+    assert not bitset.add_range(80, 91)
+
+    bitset.clear()
+    assert len(bitset) == 0
+    bitset.add(43)
+    assert not bitset.add_range(10, 99, 11)
+    assert [idx for idx in range(100) if idx in bitset] == list(range(10, 99, 11))
+    assert bitset.add_range(21, 99, 11)
+
+
+def test_text():
+    grid = FlatGrid.from_rows(["@-Š", "|", "x"], blank=" ")
+    assert grid.text(grid.cell_id((0, 0)), grid.cell_id((0, 3)), 1) == "@-Š"
+    column = grid.text(grid.cell_id((2, 0)), grid.cell_id((-1, 0)), -grid.stride)
+    assert column == "x|@"
+
+
+def test_sparse_grid():
+    rows = ["@-+", " Š", "", "x" + " " * 100 + "A"]
+    grid = SparseGrid.from_rows(rows)
+    flat_grid = FlatGrid.from_rows(rows, blank=" ")
+    assert (grid.rows, grid.columns) == (4, 102)
+    for row_idx in range(-1, 5):
+        for col_idx in range(-1, 103):
+            cell = grid.cell_id((row_idx, col_idx))
+            assert grid[cell] == flat_grid[flat_grid.cell_id((row_idx, col_idx))]
+            assert grid.position(cell) == (row_idx, col_idx)
+    assert grid[grid.cell_id((100, 100))] == ""
+    # only chunks with usable cells are stored
+    assert len(grid.chunks) == 2
+
+    # horizontal and vertical runs cross chunks
+    grid = SparseGrid.from_rows(["-" * 40, *["|"] * 40])
+    assert grid.run_end(grid.cell_id((0, 0)), 1) == grid.cell_id((0, 39))
+    last = grid.run_end(grid.cell_id((1, 0)), grid.stride)
+    assert last == grid.cell_id((40, 0))
+    assert grid.text(grid.cell_id((0, 0)), grid.cell_id((0, 3)), 1) == "---"
+
+
+def test_sparse_grid_many_symbols():
+    symbols = [chr(0x100 + idx) for idx in range(300)]
+    grid = SparseGrid.from_rows(["@" + "".join(symbols)])
+    assert grid[grid.cell_id((0, 0))] == "@"
+    assert grid[grid.cell_id((0, 300))] == symbols[-1]
+
+
+def test_chunked_bitset():
+    bitset = ChunkedBitset(1 << 20, 1024)
+    assert not bitset.bits.chunks
+    assert not bitset.add(5000)
+    assert bitset.add(5000)
+    assert 5000 in bitset and 5001 not in bitset
+    assert len(bitset.bits.chunks) == 1
+
+    assert not bitset.add_range(100, 300)
+    assert bitset.add_range(120, 280)
+    assert not bitset.add_range(10_000, 20_000, 1024)
+    assert len(bitset) == 1 + 200 + 10
+    bitset.discard(5000)
+    assert 5000 not in bitset
+
+    bitset.clear()
+    assert len(bitset) == 0
+    assert not bitset.bits.chunks
+    assert bitset.scaled(4).width == 4096
@@ -0,0 +1,90 @@
+import pytest
+
+from saona import traverse
+from saona.metrics import COUNTERS, MetricsAggregator, TraversalMetrics
+from saona.util import PathError
+
+
+def test_traversal_metrics():
+    metrics = TraversalMetrics()
+    letters, path = traverse(
+        """
+  @
+x-|-+
+  +-A
+""",
+        metrics=metrics,
+    )
+    assert (letters, path) == ("A", "@|+-A+-|-x")
+    assert metrics.counters == {
+        "moves": 8,
+        "jumps": 1,
+        "surroundings": 6,
+        "tunnels": 1,
+        "tunnel_cells": 2,
+        "revisits": 0,
+        "loop_checks": 0,
+        "visit_checks": 16,
+    }
+    assert all(seconds > 0 for seconds in metrics.timings.values())
+
+
+def test_traversal_metrics_tunnel_cells():
+    metrics = TraversalMetrics()
+    traverse(
+        """
+  @
+  |+-+
+  || |
+x-||-+
+  ||
+  ++
+""",
+        metrics=metrics,
+    )
+    # two visited cells of the tunnel and its end, not only the cell read
+    assert metrics.counters["tunnels"] == 1
+    assert metrics.counters["tunnel_cells"] == 3
+
+
+def test_traversal_metrics_revisits():
+    metrics = TraversalMetrics()
+    traverse(
+        """
+  +-A-+
+@-+   +-C-x
+  +-B-+
+""",
+        metrics=metrics,
+    )
+    assert metrics.counters["revisits"] == 3
+    assert metrics.counters["loop_checks"] == 5
+
+
+def test_traversal_metrics_on_error():
+    metrics = TraversalMetrics()
+    with pytest.raises(PathError):
+        traverse("@-A", metrics=metrics)
+    assert metrics.timings["preprocess"] > 0
+    assert metrics.counters["moves"] == 0
+
+
+def test_metrics_aggregator():
+    aggregator = MetricsAggregator()
+    for grid_str in ("@-x", "@-A-x", "@--A-+\n     x"):
+        metrics = TraversalMetrics()
+        traverse(grid_str, metrics=metrics)
+        aggregator.record(metrics)
+
+    exported = aggregator.export()
+    assert set(exported) == {*COUNTERS, "preprocess_s", "build_s", "walk_s"}
+    assert exported["moves"]["count"] == 3
+    assert exported["moves"]["sum"] == 2 + 4 + 5
+    assert exported["moves"]["buckets"][2] == 1
+    assert exported["moves"]["buckets"][4] == 2
+    assert exported["moves"]["buckets"][8] == 3
+    assert exported["walk_s"]["buckets"][float("inf")] == 3
+
+    text = aggregator.to_prometheus()
+    assert 'saona_moves_bucket{le="2"} 1' in text
+    assert "saona_moves_count 3" in text
@@ -1,5 +1,11 @@
+import re
+
+import pytest
+
+from saona.grid import FlatGrid, SparseGrid
 from saona.road_map import RoadMap
 from saona.path_finder import LetterCollector, PathFinder
+from saona.util import PathError
 
 
 def test_letter_collector():
@@ -26,3 +32,90 @@ def test_path_finder():
     letters, path = PathFinder().follow_path(road_map)
     assert letters == "A"
     assert path == "@-A++x"
+
+
+def test_path_finder_with_flat_grid():
+    grid = FlatGrid.from_rows(["@-A", " ++", " x"], blank=" ")
+    letters, path = PathFinder().follow_path(RoadMap(grid, (0, 0)))
+    assert letters == "A"
+    assert path == "@-A++x"
+
+
+def test_path_finder_long_corridors():
+    grid = FlatGrid.from_rows(
+        ["@" + "-" * 1000 + "+", *[" " * 1001 + "|"] * 500, "x" + "-" * 1000 + "+"],
+        blank=" ",
+    )
+    letters, path = PathFinder().follow_path(RoadMap(grid, (0, 0)))
+    assert letters == ""
+    assert path == "@" + "-" * 1000 + "+" + "|" * 500 + "+" + "-" * 1000 + "x"
+
+
+def test_path_finder_with_sparse_grid():
+    grid = SparseGrid.from_rows(
+        ["@" + "-" * 1000 + "+", *[" " * 1001 + "|"] * 1000, "x" + "-" * 1000 + "A"]
+    )
+    road_map = RoadMap(grid, (0, 0))
+    letters, path = PathFinder().follow_path(road_map)
+    assert letters == "A"
+    assert path == "@" + "-" * 1000 + "+" + "|" * 1000 + "A" + "-" * 1000 + "x"
+    # memory is only allocated around the path, not for the whole canvas
+    assert len(grid.chunks) < 300
+    assert len(road_map.visited.bits.chunks) < 300
+
+
+def test_path_finder_reused_road_map():
+    grid = FlatGrid.from_rows(["  +-A-+", "@-+-B-+", "  x"], blank=" ")
+    road_map = RoadMap(grid, (1, 0))
+    finder = PathFinder()
+    expected = finder.follow_path(road_map)
+    road_map.reset()
+    assert finder.follow_path(road_map) == expected
+
+
+def test_iter_path():
+    grid = FlatGrid.from_rows(["@-A-+", "    |", "x-B-+"], blank=" ")
+    pieces = list(PathFinder().iter_path(RoadMap(grid, (0, 0)), batch_size=2))
+    assert pieces[0] == ("@", "")
+    assert all(len(path) > 0 for path, _ in pieces)
+    assert "".join(path for path, _ in pieces) == "@-A-+|+-B-x"
+    assert "".join(letters for _, letters in pieces) == "AB"
+
+    # pieces before the problem are yielded before the error
+    grid = FlatGrid.from_rows(["@-A-+", "    |", "    "], blank=" ")
+    pieces = PathFinder().iter_path(RoadMap(grid, (0, 0)), batch_size=2)
+    assert next(pieces) == ("@", "")
+    with pytest.raises(PathError):
+        list(pieces)
+
+
+@pytest.mark.parametrize(
+    "rows, loop_start",
+    [
+        (["   x", "AA-S@", "BB"], (2, 1)),
+        (["   B-S", "   +-+", "   |", "   B---@", "   |", "   x"], (1, 3)),
+    ],
+)
+def test_path_finder_infinite_loop(rows, loop_start):
+    grid = FlatGrid.from_rows(rows, blank=" ")
+    start = next((r, row.index("@")) for r, row in enumerate(rows) if "@" in row)
+    road_map = RoadMap(grid, start)
+    finder = PathFinder()
+    message = re.escape(f"Loop started at {loop_start}")
+    with pytest.raises(PathError, match=message):
+        finder.follow_path(road_map)
+    # states marked during the first walk don't leak into the next one
+    road_map.reset()
+    with pytest.raises(PathError, match=message):
+        finder.follow_path(road_map)
+
+
+def test_path_finder_goes_back_to_a_turn_without_a_loop():
+    # Letter at (1, 1) goes back to visited cells twice, but letters in between
+    # are new, so the walk doesn't repeat itself and reaches the end.
+    rows = [" ++", " Š+ŠB", "  |BB", "  A-----@", "  |", "  x"]
+    road_map = RoadMap(FlatGrid.from_rows(rows, blank=" "), (3, 8))
+    assert PathFinder().follow_path(road_map) == (
+        "AŠŠBBB",
+        "@-----A|+++Š+ŠBBBŠ+Š+++|A|x",
+    )
@@ -0,0 +1,61 @@
+import pytest
+
+import saona
+from saona.path_finder import PathFinder
+from saona.precompiled import load_compiled, save_compiled
+from saona.preprocessor import process
+from saona.road_map import RoadMap
+from saona.util import PathError
+
+MAP = """\
+@---A---+
+        |
+x-B-+   Š
+    |   |
+    +---+"""
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "map.bin"
+    save_compiled(MAP, path)
+    flat_grid, flat_start = process(MAP, backend="flat")
+    for verify in (True, False):
+        grid, start = load_compiled(path, verify=verify)
+        assert start == flat_start
+        assert (grid.rows, grid.columns) == (flat_grid.rows, flat_grid.columns)
+        assert bytes(grid.cells) == bytes(flat_grid.cells)
+        assert grid.symbols == flat_grid.symbols
+        result = PathFinder().follow_path(RoadMap(grid, start))
+        assert result == saona.traverse(MAP)
+
+    with pytest.raises(PathError):
+        save_compiled("@-?-x", path)
+
+
+def test_many_symbols(tmp_path):
+    letters = [chr(code) for code in range(0x100, 0x2000) if chr(code).isupper()]
+    grid_str = "@-" + "".join(letters[:300]) + "-x"
+    path = tmp_path / "map.bin"
+    save_compiled(grid_str, path)
+    grid, start = load_compiled(path)
+    assert grid.cells.itemsize == 2
+    assert PathFinder().follow_path(RoadMap(grid, start)) == saona.traverse(grid_str)
+
+
+def test_corrupted(tmp_path):
+    path = tmp_path / "map.bin"
+    save_compiled(MAP, path)
+    data = path.read_bytes()
+    corrupted = {
+        "not a map": b"NOTAMAP!" + data[8:],
+        "header": data[:20] + b"\xff" + data[21:],
+        "cells": data[:-10] + b"\xff" + data[-9:],
+        "truncated": data[:-1],
+    }
+    for name, content in corrupted.items():
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            load_compiled(path)
+    # without verification, only the header is checked
+    path.write_bytes(corrupted["cells"])
+    load_compiled(path, verify=False)
@@ -0,0 +1,60 @@
+import pytest
+
+import saona
+from saona.prepared import PreparedMap
+from saona.road_map import Direction
+from saona.util import PathError
+
+MAP = """\
+@---A---+
+        |
+x-B-+   C
+    |   |
+    +---+"""
+
+
+def test_follow_from_start():
+    prepared = PreparedMap(MAP)
+    # same as traversing, every query starts with nothing visited
+    for _ in range(3):
+        assert prepared.follow_from((0, 0), Direction.RIGHT) == saona.traverse(MAP)
+
+
+def test_follow_from_anywhere():
+    prepared = PreparedMap(MAP)
+    assert prepared.follow_from((2, 8), Direction.DOWN) == ("CB", "C|+---+|+-B-x")
+    # starting at a letter collects it
+    assert prepared.follow_from((0, 4), Direction.RIGHT) == ("ACB", "A---+|C|+---+|+-B-x")
+    assert prepared.follow_from((2, 0), Direction.RIGHT) == ("", "x")
+    assert prepared.follow_from((4, 6), Direction.LEFT) == ("B", "--+|+-B-x")
+
+
+def test_follow_from_errors():
+    prepared = PreparedMap(MAP)
+    with pytest.raises(PathError, match="Start is not connected"):
+        prepared.follow_from((0, 2), Direction.UP)
+    with pytest.raises(PathError, match="There is no path"):
+        prepared.follow_from((1, 0), Direction.RIGHT)
+    with pytest.raises(PathError, match="nowhere to turn"):
+        prepared.follow_from((2, 8), Direction.UP)
+    # failed queries don't affect the following ones
+    assert prepared.follow_from((0, 0), Direction.RIGHT) == saona.traverse(MAP)
+    with pytest.raises(PathError):
+        PreparedMap("@-?-x")
+
+
+def test_follow_many():
+    prepared = PreparedMap(MAP)
+    results = prepared.follow_many(
+        [
+            ((0, 0), Direction.RIGHT),
+            ((0, 2), Direction.UP),
+            ((1, 0), Direction.RIGHT),
+            ((2, 2), Direction.LEFT),
+        ]
+    )
+    assert results[0] == saona.traverse(MAP)
+    assert isinstance(results[1], PathError)
+    # a start without a path is an error of its own, others are still followed
+    assert isinstance(results[2], PathError)
+    assert results[3] == ("B", "B-x")
@@ -1,6 +1,10 @@
+import concurrent.futures
+import gzip
+
 import pytest
 
-from saona.preprocessor import process
+import saona.preprocessor
+from saona.preprocessor import process, process_buffer, process_file
 from saona.util import PathError
 
 
@@ -42,3 +46,201 @@ def test_validation():
     # support non-ASCII
     grid, _ = process("@-Š-x")
     assert grid == [["@", "-", "Š", "-", "x"]]
+
+
+def test_flat_backend():
+    grid, start = process(" x\n A@", backend="flat")
+    assert start == (1, 2)
+    assert grid.rows == 2
+    assert grid.columns == 3
+    assert grid[grid.cell_id((0, 0))] == ""
+    assert grid[grid.cell_id((0, 1))] == "x"
+    assert grid[grid.cell_id((1, 2))] == "@"
+
+    grid, _ = process("@-Š-x", backend="flat")
+    assert grid[grid.cell_id((0, 2))] == "Š"
+
+
+def test_flat_backend_validation():
+    for grid_str in ("-x", "@-", "@-x-@", "@-x-x", "@-x\n@-x", "@_x", "@-a-x", "@-š-x"):
+        with pytest.raises(PathError) as flat_error:
+            process(grid_str, backend="flat")
+        with pytest.raises(PathError) as lists_error:
+            process(grid_str)
+        assert str(flat_error.value) == str(lists_error.value)
+
+    # the first problem in reading order is reported
+    with pytest.raises(PathError, match="one end"):
+        process("x@-x-@", backend="flat")
+    with pytest.raises(PathError, match="one start"):
+        process("@x-@-x", backend="flat")
+    with pytest.raises(PathError, match="invalid character: _"):
+        process("@x-@-x\n_", backend="flat")
+
+
+def test_numpy_backend():
+    pytest.importorskip("numpy")
+    grid_str = " x\n A@-\n\n  |"
+    grid, start = process(grid_str, backend="numpy")
+    flat_grid, flat_start = process(grid_str, backend="flat")
+    assert start == flat_start == (1, 2)
+    assert bytes(grid.cells) == bytes(flat_grid.cells)
+
+    # non-ASCII letters are supported too
+    grid, _ = process("@-Š-x", backend="numpy")
+    assert grid[grid.cell_id((0, 2))] == "Š"
+
+    for grid_str in ("-x", "@-", "@-x-@", "x@-x-@", "@-x\n@-x", "@_x", "@-a-x"):
+        with pytest.raises(PathError) as numpy_error:
+            process(grid_str, backend="numpy")
+        with pytest.raises(PathError) as lists_error:
+            process(grid_str)
+        assert str(numpy_error.value) == str(lists_error.value)
+
+
+def test_sparse_backend():
+    grid_str = " x\n A@-\n\n" + " " * 1000 + "Š|"
+    grid, start = process(grid_str, backend="sparse")
+    flat_grid, flat_start = process(grid_str, backend="flat")
+    assert start == flat_start == (1, 2)
+    assert (grid.rows, grid.columns) == (flat_grid.rows, flat_grid.columns)
+    assert grid[grid.cell_id((1, 3))] == "-"
+    assert grid[grid.cell_id((3, 1000))] == "Š"
+    assert grid[grid.cell_id((3, 999))] == ""
+
+    for grid_str in ("-x", "@-", "x@-x-@", "@-x\n@-x", "@_x", "@-a-x", "@-š-x"):
+        with pytest.raises(PathError) as sparse_error:
+            process(grid_str, backend="sparse")
+        with pytest.raises(PathError) as lists_error:
+            process(grid_str)
+        assert str(sparse_error.value) == str(lists_error.value)
+
+
+@pytest.mark.parametrize("backend", ["flat", "sparse"])
+def test_lazy_validation(backend):
+    # only characters which the path reaches are checked
+    grid_str = "@-A-x\n_?a\n" + "š" * 100
+    with pytest.raises(PathError):
+        process(grid_str, backend=backend)
+    grid, start = process(grid_str, backend=backend, validate="lazy")
+    assert start == (0, 0)
+    # rows are written only when they are read
+    assert not any(bytes(grid.cells) if backend == "flat" else grid.chunks)
+    assert grid[grid.cell_id((0, 2))] == "A"
+    assert grid[grid.cell_id((1, 5))] == ""
+    assert "š" not in grid.symbols
+    for position, char in (((1, 0), "_"), ((1, 2), "a"), ((2, 50), "š")):
+        with pytest.raises(PathError, match=f"invalid character: {char}"):
+            grid[grid.cell_id(position)]
+
+    # starts and ends are still validated up front
+    for grid_str in ("-x", "@-", "x@-x-@", "@-x\n@-x"):
+        with pytest.raises(PathError) as lazy_error:
+            process(grid_str, backend=backend, validate="lazy")
+        with pytest.raises(PathError) as lists_error:
+            process(grid_str)
+        assert str(lazy_error.value) == str(lists_error.value)
+
+    with pytest.raises(ValueError):
+        process("@-x", backend=backend, validate="none")
+    with pytest.raises(ValueError):
+        process("@-x", validate="lazy")
+
+
+# Pools for different numbers of workers are kept, workers of a pool
+# are forked while other pools already have their threads.
+forking_with_pools = pytest.mark.filterwarnings(
+    "ignore:This process .* is multi-threaded"
+)
+
+
+@pytest.fixture
+def band_pools():
+    yield
+    saona.preprocessor._shutdown_band_pools()
+
+
+@forking_with_pools
+def test_parallel_flat_backend(monkeypatch, band_pools):
+    # tiny bands, so even small maps are split between workers
+    monkeypatch.setattr(saona.preprocessor, "_MIN_BAND_SIZE", 4)
+    grid_str = " x\n A@-\n\n" + "|+-" * 10 + "\nB-+"
+    grid, start = process(grid_str, backend="flat", workers=3)
+    flat_grid, flat_start = process(grid_str, backend="flat")
+    assert start == flat_start == (1, 2)
+    assert (grid.rows, grid.columns) == (flat_grid.rows, flat_grid.columns)
+    assert bytes(grid.cells) == bytes(flat_grid.cells)
+
+    # the same error wins when there are more of them in different bands
+    for grid_str in (
+        "-x\n" * 5,
+        "@-\n" * 5,
+        "x@-x-\n-----\n----@",
+        "@-x\n-----\n@-x",
+        "@-x\n@@---\n_-x",
+        "@-x-\n-----\n-@_x",
+        "@-a-x\n-----\n-@",
+    ):
+        with pytest.raises(PathError) as parallel_error:
+            process(grid_str, backend="flat", workers=2)
+        with pytest.raises(PathError) as lists_error:
+            process(grid_str)
+        assert str(parallel_error.value) == str(lists_error.value)
+
+    with pytest.raises(ValueError):
+        process("@-x", backend="sparse", workers=2)
+
+
+@forking_with_pools
+def test_parallel_flat_backend_in_threads(monkeypatch, band_pools):
+    # a pool in use is not shut down when another number of workers is asked for
+    monkeypatch.setattr(saona.preprocessor, "_MIN_BAND_SIZE", 4)
+    grid_str = " x\n A@-\n\n" + "|+-" * 10 + "\nB-+"
+    expected = bytes(process(grid_str, backend="flat")[0].cells)
+    # workers are started from this thread, forking from other threads is unsafe
+    for workers in (2, 3):
+        process(grid_str, backend="flat", workers=workers)
+    with concurrent.futures.ThreadPoolExecutor(4) as threads:
+        grids = threads.map(
+            lambda workers: process(grid_str, backend="flat", workers=workers)[0],
+            [2, 3] * 10,
+        )
+        assert all(bytes(grid.cells) == expected for grid in grids)
+
+
+def test_process_buffer():
+    grid_str = " x\n A@-\n\n  Š|\n"
+    flat_grid, flat_start = process(grid_str, backend="flat")
+    for buffer in (grid_str.encode(), memoryview(grid_str.encode())):
+        grid, start = process_buffer(buffer)
+        assert start == flat_start == (1, 2)
+        assert (grid.rows, grid.columns) == (flat_grid.rows, flat_grid.columns)
+        assert bytes(grid.cells) == bytes(flat_grid.cells)
+        assert grid[grid.cell_id((3, 2))] == "Š"
+
+    for grid_str in ("-x", "@-x-@", "x@-x-@", "@-x\n@-x", "@_x", "@-š-x"):
+        with pytest.raises(PathError) as buffer_error:
+            process_buffer(grid_str.encode())
+        with pytest.raises(PathError) as lists_error:
+            process(grid_str)
+        assert str(buffer_error.value) == str(lists_error.value)
+
+
+def test_process_file(tmp_path):
+    grid_str = " x\n A@-\n"
+    flat_grid, flat_start = process(grid_str, backend="flat")
+
+    plain = tmp_path / "map.txt"
+    plain.write_bytes(grid_str.encode())
+    compressed = tmp_path / "map.txt.gz"
+    compressed.write_bytes(gzip.compress(grid_str.encode()))
+    for path in (plain, compressed):
+        grid, start = process_file(path)
+        assert start == flat_start
+        assert (grid.rows, grid.columns) == (flat_grid.rows, flat_grid.columns)
+        assert bytes(grid.cells) == bytes(flat_grid.cells)
+
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    with pytest.raises(PathError, match="missing a start"):
+        process_file(empty)
@@ -1,5 +1,6 @@
 import pytest
 
+from saona.grid import FlatGrid
 from saona.road_map import Direction, RoadMap
 
 
@@ -50,3 +51,86 @@ def test_road_map():
     assert len(around) == 2
     assert (Direction.LEFT, (0, 0)) in around
     assert (Direction.DOWN, (1, 1)) in around
+
+
+def test_road_map_with_flat_grid():
+    grid = FlatGrid.from_rows(["@+", " +--x"], blank=" ")
+    map_ = RoadMap(grid, (0, 0))
+
+    assert map_.position == (0, 0)
+    assert map_[1, 4] == "x"
+    assert map_[1, 5] == ""
+    assert map_[100, 100] == ""
+    assert not map_.is_visited((100, 100))
+
+    assert map_.move(Direction.RIGHT) == "+"
+    assert map_.position == (0, 1)
+    assert map_.cell == grid.cell_id((0, 1))
+    assert map_.is_cell_visited(map_.cell)
+    assert map_.next_cell(Direction.DOWN) == grid.cell_id((1, 1))
+    assert list(map_.iter_surrounding_cells()) == [
+        (Direction.LEFT, grid.cell_id((0, 0))),
+        (Direction.DOWN, grid.cell_id((1, 1))),
+    ]
+
+
+def test_skip_run():
+    grid = FlatGrid.from_rows(["@----+", "     |", "     |", "  x--+"], blank=" ")
+    map_ = RoadMap(grid, (0, 0))
+    map_.move(Direction.RIGHT)
+
+    assert map_.skip_run(Direction.RIGHT) == 3
+    assert map_.position == (0, 4)
+    assert all(map_.is_visited((0, col)) for col in range(1, 5))
+    # already at the end of the run
+    assert map_.skip_run(Direction.RIGHT) == 0
+
+    map_.move(Direction.RIGHT)
+    map_.move(Direction.DOWN)
+    assert map_.skip_run(Direction.DOWN) == 1
+    assert map_.position == (2, 5)
+    assert map_.is_visited((1, 5)) and map_.is_visited((2, 5))
+
+    map_.jump_to((3, 4))
+    assert map_.skip_run(Direction.LEFT) == 1
+    assert map_.position == (3, 3)
+    assert not map_.is_visited((3, 2))
+
+
+def test_reset():
+    map_ = RoadMap([["@", "-", "-", "x"]], (0, 0))
+    assert map_.move(Direction.RIGHT) == "-"
+    assert map_.first_visit
+    map_.jump_to((0, 0))
+    map_.move(Direction.RIGHT)
+    assert not map_.first_visit
+
+    map_.reset()
+    assert map_.position == (0, 0)
+    assert not map_.is_visited((0, 1))
+    map_.move(Direction.RIGHT)
+    assert map_.first_visit
+
+    map_.reset((0, 3))
+    assert map_.position == (0, 3)
+    assert len(map_.visited) == 0
+
+
+def test_next_unvisited_cell():
+    grid = FlatGrid.from_rows(["@-----x"], blank=" ")
+    map_ = RoadMap(grid, (0, 0))
+    for _ in range(4):
+        map_.move(Direction.RIGHT)
+    start = map_.cell_at((0, 0))
+    assert map_.next_unvisited_cell(start, Direction.RIGHT) == map_.cell_at((0, 5))
+    # cells visited later are jumped over too
+    map_.move(Direction.RIGHT)
+    assert map_.next_unvisited_cell(start, Direction.RIGHT) == map_.cell_at((0, 6))
+    assert map_.next_unvisited_cell(start, Direction.LEFT) == map_.cell_at((0, -1))
+
+    map_.jump_to((0, 0))
+    assert map_.chars_between(map_.cell_at((0, 6)), Direction.RIGHT) == "-----"
+    assert map_.chars_between(map_.cell_at((0, 1)), Direction.RIGHT) == ""
+
+    map_.reset()
+    assert map_.next_unvisited_cell(start, Direction.RIGHT) == map_.cell_at((0, 1))
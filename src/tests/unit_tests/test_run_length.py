@@ -0,0 +1,43 @@
+import pytest
+
+import saona
+from saona.run_length import RunLengthPath
+
+MAP = """\
+@---A---+
+        |
+x-B-+   C
+    |   |
+    +---+"""
+
+
+def test_compact_traverse():
+    letters, path = saona.traverse(MAP, compact=True)
+    assert letters == "ACB"
+    assert isinstance(path, RunLengthPath)
+    assert path == "@---A---+|C|+---+|+-B-x"
+    assert list(path.runs())[:4] == [("@", 1), ("-", 3), ("A", 1), ("-", 3)]
+    metrics = saona.metrics.TraversalMetrics()
+    assert saona.traverse(MAP, metrics, compact=True) == (letters, path)
+
+
+def test_run_length_path():
+    expanded = "@" + "-" * 1000 + "+" + "|" * 500 + "Š-x"
+    path = RunLengthPath.from_str(expanded)
+    assert len(list(path.runs())) == 7
+    assert len(path) == len(expanded)
+    assert str(path) == "".join(path) == expanded
+    for idx in (0, 1, 1000, 1001, 1002, -1, -3):
+        assert path[idx] == expanded[idx]
+    with pytest.raises(IndexError):
+        path[len(expanded)]
+    for key in (slice(0, 0), slice(5, 1003), slice(-10, None), slice(None, None, 7)):
+        assert path[key] == expanded[key]
+    assert path[5:1003] == RunLengthPath(["-", "+", "|"], [996, 1, 1])
+
+    data = path.to_bytes()
+    assert len(data) < 30
+    assert RunLengthPath.from_bytes(data) == path
+    for corrupted in (b"", data[:-1], data + b"\0", b"RLP2" + data[4:]):
+        with pytest.raises(ValueError):
+            RunLengthPath.from_bytes(corrupted)
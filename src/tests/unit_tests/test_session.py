@@ -0,0 +1,66 @@
+import pytest
+
+import saona
+from saona.path_finder import PathFinder
+from saona.session import MapSession
+from saona.util import PathError
+
+MAP = """\
+@---A---+
+        |
+x-B-+   C
+    |   |
+    +---+"""
+
+
+def _edit(grid_str: str, row_idx: int, col_idx: int, char: str) -> str:
+    rows = grid_str.split("\n")
+    row = rows[row_idx].ljust(col_idx + 1)
+    rows[row_idx] = row[:col_idx] + char + row[col_idx + 1 :]
+    return "\n".join(rows)
+
+
+def _outcome(traverse, *args):
+    try:
+        return traverse(*args)
+    except PathError as e:
+        return str(e)
+
+
+def test_session():
+    session = MapSession(MAP, checkpoint_interval=2)
+    assert session.traverse() == saona.traverse(MAP)
+
+    edited = MAP
+    for row_idx, col_idx, char in [(4, 6, "D"), (0, 2, "E"), (2, 1, "+"), (2, 1, "-")]:
+        session.set_cell(row_idx, col_idx, char)
+        edited = _edit(edited, row_idx, col_idx, char)
+        assert _outcome(session.traverse) == _outcome(saona.traverse, edited)
+
+
+def test_session_errors():
+    session = MapSession(MAP)
+    session.set_cell(1, 8, " ")
+    with pytest.raises(PathError, match="nowhere to turn"):
+        session.traverse()
+    session.set_cell(1, 8, "|")
+    session.set_cell(1, 0, "@")
+    with pytest.raises(PathError, match="exactly one start"):
+        session.traverse()
+    # moving the start follows the path from the new start
+    session.set_cell(0, 0, " ")
+    assert session.traverse() == ("", "@x")
+
+    with pytest.raises(PathError, match="invalid character"):
+        session.set_cell(0, 0, "a")
+    with pytest.raises(ValueError):
+        session.set_cell(5, 0, "-")
+
+
+def test_session_skips_unread_cells(monkeypatch):
+    expected = saona.traverse(_edit(MAP, 3, 0, "A"))
+    session = MapSession(MAP)
+    session.traverse()
+    monkeypatch.setattr(PathFinder, "_walk", lambda _: pytest.fail("walked again"))
+    session.set_cell(3, 0, "A")
+    assert session.traverse() == expected
@@ -0,0 +1,46 @@
+from saona.grid import FlatGrid
+from saona.preprocessor import process_file
+
+
+def _ring(size: int) -> list[str]:
+    return [
+        "@" + "-" * (size - 2) + "+",
+        *[" " * (size - 1) + "|"] * (size // 2),
+        " " * (size - 2) + "Š|",
+        *[" " * (size - 1) + "|"] * (size // 2),
+        "x" + "-" * (size - 2) + "A",
+    ]
+
+
+def test_tiled_grid(tmp_path):
+    rows = _ring(150)
+    path = tmp_path / "map.txt"
+    path.write_text("\n".join(rows), encoding="utf-8")
+    flat_grid = FlatGrid.from_rows(rows, blank=" ")
+
+    grid, start = process_file(path, backend="tiled", memory_budget=0)
+    with grid:
+        assert start == (0, 0)
+        assert (grid.rows, grid.columns) == (flat_grid.rows, flat_grid.columns)
+        for row_idx in range(-1, grid.rows + 1):
+            for col_idx in range(-1, grid.columns + 1):
+                cell = grid.cell_id((row_idx, col_idx))
+                expected = flat_grid[flat_grid.cell_id((row_idx, col_idx))]
+                assert grid[cell] == expected
+                assert grid.position(cell) == (row_idx, col_idx)
+        # only a few tiles are kept, the rest was evicted
+        stats = grid.stats()
+        assert stats["tiles"] == 4
+        assert stats["evictions"] == stats["misses"] - 4
+        assert stats["hits"] > 0
+
+
+def test_tiled_grid_many_symbols(tmp_path):
+    letters = [chr(code) for code in range(0x100, 0x2000) if chr(code).isupper()]
+    row = "@-" + "".join(letters[:300]) + "-x"
+    path = tmp_path / "map.txt"
+    path.write_text(row, encoding="utf-8")
+    grid, _ = process_file(path, backend="tiled")
+    with grid:
+        assert grid[grid.cell_id((0, 301))] == letters[299]
+        assert grid[grid.cell_id((0, 2))] == letters[0]